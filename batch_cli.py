@@ -0,0 +1,192 @@
+"""
+Headless batch analysis (no Qt), e.g. for nightly cron runs on a server.
+
+Usage:
+    python batch_cli.py FOLDER -o sonuclar.xlsx [-o sonuclar.csv] [-o sonuclar.json]
+                        [--mode thread|process] [--batch-size N]
+                        [--decode-workers N] [--post-workers N]  (thread mode)
+                        [--processes N]                          (process mode)
+                        [--side-policy ocr_always|tag_first|ocr_off] [--no-cache]
+                        [--stream sonuclar.jsonl|.csv|.parquet]
+
+The output format follows the file extension (.xlsx, .csv, .json).
+With --stream every finished study is appended to that file as it arrives,
+and the outputs are built from it at the end.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import multiprocessing
+
+from src.ai.analyzer import DEFAULT_MODEL_PATH, SIDE_POLICIES
+from src.core.batch_item import export_rows, record_row, sort_rows
+from src.core.folder_scanner import FolderScanner, scan_items
+from src.core.batch_runner import BatchRunner
+from src.core.result_cache import DEFAULT_CACHE_PATH, ResultCache
+from src.core.result_sink import SINK_FORMATS, open_sink, latest_records
+
+OUTPUT_FORMATS = (".xlsx", ".csv", ".json")
+
+
+def write_results(path, rows):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".xlsx":
+        import pandas as pd # Deferred: only needed for Excel output
+        pd.DataFrame(rows).to_excel(path, index=False)
+    elif ext == ".csv":
+        # utf-8-sig so Excel shows Turkish characters correctly
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else [])
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pes Planus toplu analiz (arayüzsüz)")
+    parser.add_argument("folder", help="Taranacak klasör")
+    parser.add_argument("-o", "--output", action="append", default=[],
+                        help="Sonuç dosyası (.xlsx, .csv, .json); birden fazla verilebilir")
+    parser.add_argument("--mode", choices=["thread", "process"], default="thread",
+                        help="thread: tek süreç, process: her çekirdekte ayrı model")
+    parser.add_argument("--decode-workers", type=int, default=None,
+                        help="thread modu: görüntü çözme iş parçacığı sayısı")
+    parser.add_argument("--post-workers", type=int, default=None,
+                        help="thread modu: geometri/OCR son işlem iş parçacığı sayısı")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="process modu: süreç sayısı (her süreçte bir model; varsayılan: çekirdek sayısı)")
+    parser.add_argument("--batch-size", type=int, default=8, help="Model ileri geçişi başına görüntü")
+    parser.add_argument("--scan-workers", type=int, default=None, help="Klasör tarama / DICOM başlığı iş parçacığı sayısı")
+    parser.add_argument("--verify-files", action="store_true",
+                        help="Değişmemiş klasörleri de yeniden listele (yerinde yeniden yazılan dosyaları yakalar, daha yavaş)")
+    parser.add_argument("--side-policy", choices=SIDE_POLICIES, default=None, help="Taraf belirleme sırası")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Model ağırlıkları")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Sonuç önbelleği (SQLite)")
+    parser.add_argument("--no-cache", action="store_true", help="Önbelleği kullanma")
+    parser.add_argument("--stream", default=None,
+                        help="Her sonucu geldiği anda eklenen dosya (.jsonl, .csv; .parquet: part dosyalarından oluşan klasör)")
+    args = parser.parse_args(argv)
+
+    if not args.output and not args.stream:
+        parser.error("En az bir --output veya --stream gerekli")
+    if args.stream and os.path.splitext(args.stream)[1].lower() not in SINK_FORMATS:
+        parser.error(f"Desteklenmeyen akış biçimi: {args.stream} ({', '.join(SINK_FORMATS)})")
+    if args.mode == "process" and (args.decode_workers or args.post_workers):
+        parser.error("--decode-workers / --post-workers yalnızca --mode thread ile kullanılabilir")
+    if args.mode == "thread" and args.processes:
+        parser.error("--processes yalnızca --mode process ile kullanılabilir")
+
+    for out in args.output:
+        if os.path.splitext(out)[1].lower() not in OUTPUT_FORMATS:
+            parser.error(f"Desteklenmeyen çıktı biçimi: {out} ({', '.join(OUTPUT_FORMATS)})")
+    if not os.path.isdir(args.folder):
+        parser.error(f"Klasör bulunamadı: {args.folder}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    scanner = FolderScanner(args.folder, workers=args.scan_workers, verify_files=args.verify_files)
+    items = sorted(scan_items(args.folder, workers=args.scan_workers, scanner=scanner), key=lambda item: item.path)
+    print(f"{len(items)} dosya bulundu: {args.folder}")
+    print(f"Tarama: {scanner.summary()}")
+    if not items:
+        return 1
+
+    cache = None
+    if not args.no_cache:
+        try:
+            cache = ResultCache(args.cache, args.model)
+        except Exception as e:
+            print(f"Sonuç önbelleği açılamadı: {e}")
+
+    analyzer = None
+    if args.mode != "process":
+        from src.ai.analyzer import PesPlanusAnalyzer
+        analyzer = PesPlanusAnalyzer(args.model)
+        if analyzer.model is None:
+            print("Model yüklenemedi, analiz yapılamıyor.")
+            return 1
+
+    sink = None
+    if args.stream:
+        try:
+            sink = open_sink(args.stream)
+        except Exception as e:
+            print(f"Sonuç dosyası açılamadı: {e}")
+            return 1
+
+    last_report = [0.0]
+    start = time.perf_counter()
+
+    def on_progress(done, total):
+        now = time.perf_counter()
+        if done == total or now - last_report[0] >= 5.0:
+            last_report[0] = now
+            print(f"İşleniyor: {done}/{total}")
+
+    runner = BatchRunner(
+        items,
+        analyzer=analyzer,
+        batch_size=args.batch_size,
+        decode_workers=args.decode_workers,
+        post_workers=args.post_workers,
+        mode=args.mode,
+        workers=args.processes,
+        cache=cache,
+        side_policy=args.side_policy,
+        on_item=sink.write if sink else None,
+        on_progress=on_progress,
+        model_path=args.model,
+    )
+    try:
+        runner.run()
+    except KeyboardInterrupt:
+        runner.stop()
+        # Unfinished items are reported as cancelled rather than "İşleniyor"/"Bekliyor"
+        for item in items:
+            if item.status in ("Bekliyor", "İşleniyor"):
+                item.status = "İptal"
+        print("Durduruldu.")
+    finally:
+        if sink:
+            sink.close()
+        if cache:
+            cache.close() # Every result is committed as it arrives; close before exporting
+    elapsed = time.perf_counter() - start
+
+    completed = sum(1 for item in items if item.status == "Tamamlandı")
+    failed = sum(1 for item in items if item.status == "Hata")
+    cancelled = sum(1 for item in items if item.status == "İptal")
+    analyzed = completed + failed - runner.cache_hits # Cache hits cost nothing; keep them out of the rate
+    rate = analyzed / elapsed if elapsed > 0 else 0.0
+    print(f"Tamamlandı: {completed} (önbellekten {runner.cache_hits}), Hata: {failed}"
+          + (f", İptal: {cancelled}" if cancelled else ""))
+    print(f"Süre: {elapsed:.1f} s, Hız: {rate:.2f} görüntü/s")
+
+    if sink:
+        # Outputs come from the streamed file; a killed run can be exported the same way
+        print(f"Sonuç dosyası: {args.stream} ({sink.count} kayıt)")
+        rows = sort_rows([record_row(r) for r in latest_records(args.stream)]) if args.output else []
+    else:
+        rows = export_rows(items)
+    for out in args.output:
+        try:
+            write_results(out, rows)
+            print(f"Kaydedildi: {out}")
+        except Exception as e:
+            print(f"Kaydedilemedi ({out}): {e}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    # Required for the process pool in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Benchmark for DICOM rescale + windowing (window_to_uint8) against the
+previous float64 pipeline of load_dicom_array.
+
+Usage:
+    python -m benchmarks.bench_dicom_window [--size 3000x2500] [--repeat 10]
+
+Runs on synthetic 16-bit data (no pydicom needed), checks that both paths
+give identical uint8 output and reports time and peak temporary memory.
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.core.dicom_loader import window_to_uint8
+
+
+def legacy_window(pixel_array, slope, intercept, window):
+    """The former float64 implementation, kept for comparison."""
+    pixel_array = pixel_array.astype(float)
+    pixel_array = pixel_array * slope + intercept
+    if window is not None:
+        min_val, max_val = window
+        pixel_array = np.clip(pixel_array, min_val, max_val)
+    else:
+        min_val = np.min(pixel_array)
+        max_val = np.max(pixel_array)
+    if max_val != min_val:
+        pixel_array = (pixel_array - min_val) / (max_val - min_val) * 255.0
+    else:
+        pixel_array = pixel_array * 0
+    return np.uint8(pixel_array)
+
+
+def measure(fn, repeat):
+    fn() # Warm-up
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat * 1000.0
+    peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="3000x2500", help="WIDTHxHEIGHT")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    rng = np.random.default_rng(0)
+    cases = [
+        ("uint16, pencere", rng.integers(0, 4096, (height, width), dtype=np.uint16), 1.0, 0.0, (2048.0, 3500.0)),
+        ("uint16, tam aralık", rng.integers(0, 4096, (height, width), dtype=np.uint16), 1.0, 0.0, None),
+        ("int16, eğim/kesişim", rng.integers(-2000, 2000, (height, width), dtype=np.int16), 0.5, 1024.0, (300.0, 1500.0)),
+    ]
+
+    print(f"Görüntü: {width}x{height}")
+    for name, data, slope, intercept, window in cases:
+        same = np.array_equal(
+            legacy_window(data, slope, intercept, window),
+            window_to_uint8(data, slope, intercept, window),
+        )
+        old_ms, old_mb = measure(lambda: legacy_window(data, slope, intercept, window), args.repeat)
+        new_ms, new_mb = measure(lambda: window_to_uint8(data, slope, intercept, window), args.repeat)
+        print(f"{name:22s} eski: {old_ms:7.1f} ms / {old_mb:6.1f} MB   "
+              f"LUT: {new_ms:6.1f} ms / {new_mb:5.1f} MB   aynı: {'evet' if same else 'HAYIR'}")
+
+
+if __name__ == "__main__":
+    main()
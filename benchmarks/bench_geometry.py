@@ -0,0 +1,63 @@
+"""
+Micro-benchmark for the geometry stage (analyze_calcaneal_pitch).
+
+Usage:
+    python -m benchmarks.bench_geometry [--size 3000x2500] [--repeat 20]
+
+Builds a synthetic calcaneus-like mask at DR resolution and reports the
+per-image cost of the keypoint extraction, of the full-resolution geometry
+call and of the ROI path used by the analyzer (512x512 model mask in).
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from src.ai.analyzer import analyze_calcaneal_pitch, find_hull_keypoints, measure_calcaneal_pitch
+
+
+def synthetic_case(width, height):
+    mask = np.zeros((height, width), np.uint8)
+    center = (width // 2, int(height * 0.6))
+    axes = (int(width * 0.3), int(height * 0.12))
+    cv2.ellipse(mask, center, axes, 15, 0, 360, 255, -1)
+    image = np.random.default_rng(0).integers(0, 255, (height, width), dtype=np.uint8)
+    return image, mask
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="3000x2500", help="WIDTHxHEIGHT")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    image, mask = synthetic_case(width, height)
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+    contour = max(contours, key=cv2.contourArea)
+    x, _, w, _ = cv2.boundingRect(contour)
+    points = contour[:, 0, :] # Worst case: every contour point instead of the hull
+
+    print(f"Görüntü: {width}x{height}, kontur noktası: {len(points)}")
+    print(f"Keypoint (tüm kontur):  {timed(lambda: find_hull_keypoints(points, x + w // 2), args.repeat * 10):8.3f} ms")
+    print(f"analyze_calcaneal_pitch: {timed(lambda: analyze_calcaneal_pitch(image, mask), args.repeat):8.1f} ms")
+
+    # Old analyzer path: full-size resize of the model mask, then geometry
+    model_mask = cv2.resize(mask, (512, 512), interpolation=cv2.INTER_NEAREST)
+    full = lambda: analyze_calcaneal_pitch(image, cv2.resize(model_mask, (width, height), interpolation=cv2.INTER_NEAREST))
+    roi = lambda: measure_calcaneal_pitch(model_mask, width, height)
+    print(f"Tam çözünürlük maske:    {timed(full, args.repeat):8.1f} ms")
+    print(f"ROI maske (çizimsiz):    {timed(roi, args.repeat):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark for the reduced-resolution decode used by batch inference
+(load_image_array / load_dicom_array with min_width) against a full decode.
+
+Usage:
+    python -m benchmarks.bench_reduced_decode [--size 3000x2500] [--repeat 10]
+
+Writes a synthetic radiograph-like JPEG and 16-bit DICOM (the DICOM part
+needs pydicom), then for both decode floors (model only: 512 px, with OCR:
+MarkerDetector.WORK_WIDTH) reports decode time and size, and how far the
+512x512 model input lies from an area-averaged downscale of the full image
+(the resize preprocess() does on a full decode is bilinear, which aliases
+at these ratios, so the full path is listed as well).
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from src.core.dicom_loader import load_image_array, load_dicom_array, MODEL_MIN_SIZE
+from src.core.marker_detector import MarkerDetector
+
+MODEL_INPUT_SIZE = (512, 512)
+
+
+def synthetic_study(w, h, seed=0, max_value=255):
+    """Smooth background, a bright bone-like ellipse, film grain and an "R" marker."""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:h, 0:w].astype(np.float32)
+    img = 40 + 30 * (xx / w) + 20 * np.sin(yy / h * 3.0)
+    bone = ((xx - w * 0.55) / (w * 0.25)) ** 2 + ((yy - h * 0.6) / (h * 0.15)) ** 2 < 1
+    img[bone] += 120
+    img += rng.normal(0, 6, img.shape)
+    marker = np.zeros((h, w), np.uint8)
+    cv2.putText(marker, "R", (w // 20, h // 8), cv2.FONT_HERSHEY_SIMPLEX, w / 600, 255, max(2, w // 300))
+    img[marker > 0] = 255
+    img = np.clip(img, 0, 255) * (max_value / 255.0)
+    return img.astype(np.uint8 if max_value == 255 else np.uint16)
+
+
+def write_dicom(path, pixels):
+    import pydicom
+    from pydicom.dataset import FileDataset, FileMetaDataset
+    from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+
+    meta = FileMetaDataset()
+    meta.MediaStorageSOPClassUID = "1.2.840.10008.5.1.4.1.1.1.1" # Digital X-Ray
+    meta.MediaStorageSOPInstanceUID = generate_uid()
+    meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    ds = FileDataset(path, {}, file_meta=meta, preamble=b"\0" * 128)
+    ds.SOPClassUID = meta.MediaStorageSOPClassUID
+    ds.SOPInstanceUID = meta.MediaStorageSOPInstanceUID
+    ds.PatientName, ds.PatientID, ds.Modality = "TEST^HASTA", "123", "DX"
+    ds.Rows, ds.Columns = pixels.shape
+    ds.SamplesPerPixel, ds.PhotometricInterpretation = 1, "MONOCHROME2"
+    ds.BitsAllocated, ds.BitsStored, ds.HighBit, ds.PixelRepresentation = 16, 12, 11, 0
+    ds.RescaleSlope, ds.RescaleIntercept = 1, 0
+    ds.WindowCenter, ds.WindowWidth = 2048, 4096
+    ds.PixelData = pixels.tobytes()
+    pydicom.dcmwrite(path, ds, enforce_file_format=True)
+
+
+def timed(fn, repeat):
+    fn() # Warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def model_drift(img, reference):
+    diff = np.abs(cv2.resize(img, MODEL_INPUT_SIZE).astype(np.int16) - reference.astype(np.int16))
+    return f"mean {diff.mean():.2f}, p99 {np.percentile(diff, 99):.0f}"
+
+
+def report(name, loader, path, repeat):
+    full_s, (full, _) = timed(lambda: loader(path), repeat)
+    reference = cv2.resize(full, MODEL_INPUT_SIZE, interpolation=cv2.INTER_AREA)
+    print(f"{name}: {full.shape[1]}x{full.shape[0]}")
+    print(f"  {'full decode':22s} {full_s * 1000:7.1f} ms  {full.nbytes / 1e6:5.1f} MB  "
+          f"model input drift {model_drift(full, reference)}")
+    for label, floor in (("model only", MODEL_MIN_SIZE), ("with OCR", MarkerDetector.WORK_WIDTH)):
+        reduced_s, (reduced, _) = timed(lambda: loader(path, floor), repeat)
+        size = f"{reduced.shape[1]}x{reduced.shape[0]}"
+        print(f"  {label + ' (' + size + ')':22s} {reduced_s * 1000:7.1f} ms  {reduced.nbytes / 1e6:5.1f} MB  "
+              f"model input drift {model_drift(reduced, reference)}  ({full_s / reduced_s:.1f}x faster)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="3000x2500", help="WxH of the synthetic study")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    w, h = (int(v) for v in args.size.lower().split("x"))
+
+    tmp = tempfile.mkdtemp()
+    jpg_path = os.path.join(tmp, "study.jpg")
+    dcm_path = os.path.join(tmp, "study.dcm")
+    try:
+        cv2.imwrite(jpg_path, synthetic_study(w, h), [cv2.IMWRITE_JPEG_QUALITY, 92])
+        report("JPEG", load_image_array, jpg_path, args.repeat)
+        try:
+            write_dicom(dcm_path, synthetic_study(w, h, max_value=4095))
+        except ImportError:
+            print("DICOM: skipped (pydicom not installed)")
+        else:
+            report("DICOM (16-bit, uncompressed)", load_dicom_array, dcm_path, args.repeat)
+    finally:
+        for path in (jpg_path, dcm_path):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,90 +1,67 @@
 import os
-from src.core.dicom_loader import load_image_array, load_dicom_array
+from src.core.dicom_loader import load_array, MODEL_MIN_SIZE
+from src.core.timing import StageTimer
 import cv2
 import numpy as np
-import torch
 import math
-import segmentation_models_pytorch as smp
-from typing import Tuple, Dict, Any, List, Optional
-from PIL import Image
+import time
+from typing import Tuple, Dict, Any, List, Optional, Iterator, Callable
 
-def analyze_calcaneal_pitch(
-    original_img: np.ndarray, 
-    prediction_mask: np.ndarray
-) -> Tuple[np.ndarray, float, Tuple[Tuple[int, int], Tuple[int, int]], Tuple[Tuple[int, int], Tuple[int, int]]]:
-    """
-    Analyzes the Calcaneal Pitch Angle with robust Convex Hull logic, strict tie-breaking, and virtual Ground Line.
-    """
-    
-    # Ensure formats
-    if len(original_img.shape) == 2:
-        vis_img = cv2.cvtColor(original_img, cv2.COLOR_GRAY2BGR)
-    else:
-        vis_img = original_img.copy()
+# torch / segmentation_models_pytorch are imported on first use: importing them
+# costs seconds and most UI start-ups never touch the model.
 
-    h_img, w_img = prediction_mask.shape[:2]
+DEFAULT_MODEL_PATH = "calcaneus_unet_resnet34_best.pth"
 
-    # --- 1. Morphological Cleaning ---
-    kernel = np.ones((5, 5), np.uint8)
-    cleaned_mask = cv2.morphologyEx(prediction_mask, cv2.MORPH_OPEN, kernel)
-    
-    # Keep only the largest contour
-    contours, _ = cv2.findContours(cleaned_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    
-    if not contours:
-        return vis_img, 0.0, ((0, 0), (0, 0)), ((0, 0), (0, 0))
+# Side resolution policies (which sources are consulted, in order, before anatomy)
+SIDE_POLICY_OCR_ALWAYS = "ocr_always" # OCR marker > filename > DICOM tag
+SIDE_POLICY_TAG_FIRST = "tag_first"   # DICOM tag > filename > OCR (only when both missing)
+SIDE_POLICY_OCR_OFF = "ocr_off"       # DICOM tag > filename, OCR never runs
+SIDE_POLICIES = (SIDE_POLICY_OCR_ALWAYS, SIDE_POLICY_TAG_FIRST, SIDE_POLICY_OCR_OFF)
+
+def _valid_side(value: Optional[str]) -> Optional[str]:
+    return value if value in ["L", "R"] else None
+
+def _corner_point(points: np.ndarray) -> Optional[Tuple[int, int]]:
+    """
+    Finds the corner in the bottom slice of a hull half (N x 2 array).
+    """
+    if len(points) == 0:
+        return None
     
-    largest_contour = max(contours, key=cv2.contourArea)
+    # 1. Find Deepest Level
+    ys = points[:, 1]
+    y_max = ys.max() # Deepest point
     
-    # --- 2. Keypoint Detection (Vertical Split + Strict Tie-Breaking) ---
-    # Find bounding box
-    x, y, w, h = cv2.boundingRect(largest_contour)
-    mid_x = x + w // 2
+    # 2. Strict Filter: Get ALL pixels at this deepest level
+    # User Request: "bu bölgedeki en alt seviyedeki tüm pikselleri (maksimum Y) belirle"
+    # 3. Center of Mass: Calculate Mean X
+    # User Request: "X koordinatlarının ortalamasını (mean) alarak... tam kavisin merkezine sabitle"
+    avg_x = points[ys == y_max, 0].mean()
     
-    # Get all points in the contour (or hull for robustness)
-    hull = cv2.convexHull(largest_contour)
-    hull_points = hull[:, 0, :]
+    return (int(avg_x), int(y_max))
+
+def find_hull_keypoints(hull_points: np.ndarray, mid_x: int) -> Tuple[Tuple[int, int], Tuple[int, int], bool]:
+    """
+    Point A (heel) and Point B (anterior-inferior corner) from convex hull points.
+    Vectorized: boolean masks split the halves, argmax/argmin pick the extremes
+    (first occurrence, matching the previous max()/min() tie-breaking).
+    Returns (pa, pb, heel_is_left).
+    """
+    pts = hull_points.astype(np.int64)
     
     # Split into Posterior (Left) and Anterior (Right) halves based on Geometric Vertical Center
-    left_half = [pt for pt in hull_points if pt[0] < mid_x]
-    right_half = [pt for pt in hull_points if pt[0] >= mid_x]
+    is_left = pts[:, 0] < mid_x
+    left_half = pts[is_left]
+    right_half = pts[~is_left]
     
-    # Find Points with "Lowest 5% Slice" Logic
+    # Find Points with "Lowest Slice" Logic
     # Goal: Target the corners (tubercle) rather than just the lowest pixel.
-    
-    # helper for finding corner in bottom slice
-    def get_corner_point(points, is_left_half):
-        if not points: return None
-        
-        # 1. Find Deepest Level
-        y_values = [p[1] for p in points]
-        y_max = max(y_values) # Deepest point
-        
-        # 2. Strict Filter: Get ALL pixels at this deepest level
-        # User Request: "bu bölgedeki en alt seviyedeki tüm pikselleri (maksimum Y) belirle"
-        candidates = [p for p in points if p[1] == y_max]
-        
-        if not candidates: 
-            return points[0] # Should not happen
-            
-        # 3. Center of Mass: Calculate Mean X
-        # User Request: "X koordinatlarının ortalamasını (mean) alarak... tam kavisin merkezine sabitle"
-        avg_x = sum(p[0] for p in candidates) / len(candidates)
-        
-        return [int(avg_x), y_max]
-
-    # Point A (Posterior/Heel) & Point B (Anterior/Joint) Logic
-    # We identify the Heel (Point A) as the point closest to the bottom (Max Y).
-    
-    p1_deepest = get_corner_point(left_half, is_left_half=True)
-    p2_deepest = get_corner_point(right_half, is_left_half=False)
+    p1_deepest = _corner_point(left_half)
+    p2_deepest = _corner_point(right_half)
     
     # Fallbacks
-    if p1_deepest is None: p1_deepest = min(hull_points, key=lambda p: p[0])
-    if p2_deepest is None: p2_deepest = max(hull_points, key=lambda p: p[0])
-
-    p1_deepest = tuple(p1_deepest)
-    p2_deepest = tuple(p2_deepest)
+    if p1_deepest is None: p1_deepest = tuple(int(v) for v in pts[np.argmin(pts[:, 0])])
+    if p2_deepest is None: p2_deepest = tuple(int(v) for v in pts[np.argmax(pts[:, 0])])
 
     # 1. Determine Orientation (Left vs Right)
     # The side with the DEEPER point is the Heel side.
@@ -94,30 +71,62 @@ def analyze_calcaneal_pitch(
         pa = p1_deepest # Point A is Heel (Deepest)
         
         # Point B: Anterior-Inferior Corner (Right Half)
-        # Target: Bottom-Right most point in the Right Half.
         # Score: Maximize (X + Y). (Forward + Down)
-        # Large X (Right), Large Y (Down).
-        if right_half:
-            pb = max(right_half, key=lambda p: int(p[0]) + int(p[1]))
-            pb = tuple(pb)
+        if len(right_half):
+            pb = tuple(int(v) for v in right_half[np.argmax(right_half[:, 0] + right_half[:, 1])])
         else:
             pb = p2_deepest
-            
     else:
         # Right is Deeper -> Heel is Right, Toes are Left
         heel_is_left = False
         pa = p2_deepest # Point A is Heel (Deepest)
         
         # Point B: Anterior-Inferior Corner (Left Half)
-        # Target: Bottom-Left most point in the Left Half.
         # Score: Maximize (-X + Y) -> Minimize (X - Y).
-        # Small X (Left), Large Y (Down).
-        if left_half:
-            pb = min(left_half, key=lambda p: int(p[0]) - int(p[1]))
-            pb = tuple(pb)
+        if len(left_half):
+            pb = tuple(int(v) for v in left_half[np.argmin(left_half[:, 0] - left_half[:, 1])])
         else:
             pb = p1_deepest
 
+    return pa, pb, heel_is_left
+
+def find_calcaneal_keypoints(prediction_mask: np.ndarray) -> Optional[Tuple[Tuple[int, int], Tuple[int, int], bool]]:
+    """
+    Cleans the mask and locates Point A / Point B on its largest contour.
+    Returns (pa, pb, heel_is_left) in mask coordinates, or None for an empty mask.
+    """
+    # --- 1. Morphological Cleaning ---
+    kernel = np.ones((5, 5), np.uint8)
+    cleaned_mask = cv2.morphologyEx(prediction_mask, cv2.MORPH_OPEN, kernel)
+    
+    # Keep only the largest contour
+    contours, _ = cv2.findContours(cleaned_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    
+    if not contours:
+        return None
+    
+    largest_contour = max(contours, key=cv2.contourArea)
+    
+    # --- 2. Keypoint Detection (Vertical Split + Strict Tie-Breaking) ---
+    # Find bounding box
+    x, y, w, h = cv2.boundingRect(largest_contour)
+    mid_x = x + w // 2
+    
+    # Get all points in the contour (or hull for robustness)
+    hull = cv2.convexHull(largest_contour)
+    hull_points = hull[:, 0, :]
+    
+    return find_hull_keypoints(hull_points, mid_x)
+
+def calcaneal_pitch_from_keypoints(
+    pa: Tuple[int, int], 
+    pb: Tuple[int, int], 
+    heel_is_left: bool, 
+    w_img: int
+) -> Tuple[float, Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """
+    Ground line and pitch angle from the keypoints. Returns (pitch_angle, ground_points).
+    """
     # --- 3. Ground Line Detection (Fixed to Point A) ---
     # User Request: "Mavi çizgi her zaman topuğun (pa) arkasına doğru uzanmalı."
     # Ground Line must be perfectly horizontal (0 degree) at Point A's Y level.
@@ -136,14 +145,7 @@ def analyze_calcaneal_pitch(
         vis_gx1 = max(0, pa[0] - 250)
         vis_gx2 = pa[0]
         
-    vis_gy1 = ground_y
-    vis_gy2 = ground_y
-    
-    ground_angle = 0.0
-    ground_points = ((vis_gx1, vis_gy1), (vis_gx2, vis_gy2))
-    
-    # Draw Ground Line (Cyan) - Short reference line
-    cv2.line(vis_img, ground_points[0], ground_points[1], (255, 255, 0), 2)
+    ground_points = ((vis_gx1, ground_y), (vis_gx2, ground_y))
     
     # --- 4. Calculation ---
     # User Request: "0 derecelik yatay hat ile pa-pb ... arasında hesapla"
@@ -158,9 +160,27 @@ def analyze_calcaneal_pitch(
         # Absolute Slope Logic (Request: "Mutlak Eğim Mantığı")
         # Use atan(abs(dy)/abs(dx)) to ensure strict 0-90 degree acute angle regardless of direction.
         pitch_angle = math.degrees(math.atan(abs(dy) / abs(dx)))
-    pitch_angle = round(pitch_angle, 1)
+    return round(pitch_angle, 1), ground_points
 
-    # --- 5. Visualization ---
+def render_calcaneal_pitch(
+    original_img: np.ndarray, 
+    pitch_angle: float, 
+    calc_pts: Tuple[Tuple[int, int], Tuple[int, int]], 
+    ground_points: Tuple[Tuple[int, int], Tuple[int, int]]
+) -> np.ndarray:
+    """
+    Draws the ground line, calcaneus line, keypoints and angle label on a BGR copy.
+    """
+    # Ensure formats
+    if len(original_img.shape) == 2:
+        vis_img = cv2.cvtColor(original_img, cv2.COLOR_GRAY2BGR)
+    else:
+        vis_img = original_img.copy()
+
+    pa, pb = calc_pts
+
+    # Draw Ground Line (Cyan) - Short reference line
+    cv2.line(vis_img, ground_points[0], ground_points[1], (255, 255, 0), 2)
     
     # Draw Calcaneus Line (Magenta)
     cv2.line(vis_img, pa, pb, (255, 0, 255), 3) 
@@ -184,14 +204,85 @@ def analyze_calcaneal_pitch(
     cv2.rectangle(vis_img, (mid_x - 5, mid_y - th - 5), (mid_x + tw + 5, mid_y + 5), (0,0,0), -1)
     cv2.putText(vis_img, label_text, (mid_x, mid_y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
     
+    return vis_img
+
+def analyze_calcaneal_pitch(
+    original_img: np.ndarray, 
+    prediction_mask: np.ndarray
+) -> Tuple[np.ndarray, float, Tuple[Tuple[int, int], Tuple[int, int]], Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """
+    Analyzes the Calcaneal Pitch Angle with robust Convex Hull logic, strict tie-breaking, and virtual Ground Line.
+    prediction_mask must be at the image's resolution (see measure_calcaneal_pitch for model-resolution masks).
+    """
+    keypoints = find_calcaneal_keypoints(prediction_mask)
+    if keypoints is None:
+        vis_img = cv2.cvtColor(original_img, cv2.COLOR_GRAY2BGR) if len(original_img.shape) == 2 else original_img.copy()
+        return vis_img, 0.0, ((0, 0), (0, 0)), ((0, 0), (0, 0))
+
+    pa, pb, heel_is_left = keypoints
+    pitch_angle, ground_points = calcaneal_pitch_from_keypoints(pa, pb, heel_is_left, prediction_mask.shape[1])
+    vis_img = render_calcaneal_pitch(original_img, pitch_angle, (pa, pb), ground_points)
     return vis_img, pitch_angle, (pa, pb), ground_points
 
+def _nearest_index_map(src_len: int, dst_len: int) -> np.ndarray:
+    """Source index for every destination pixel, exactly as cv2.resize INTER_NEAREST picks it."""
+    return np.minimum(np.floor(np.arange(dst_len) * (src_len / dst_len)).astype(np.int64), src_len - 1)
+
+def upscale_mask_roi(mask: np.ndarray, out_w: int, out_h: int, margin: int = 8) -> Tuple[Optional[np.ndarray], Tuple[int, int]]:
+    """
+    Nearest-neighbour upscaling of only the mask's bounding box (plus a margin
+    wide enough for the 5x5 opening). Pixel-identical to the same region of a
+    full cv2.resize, without allocating the full-resolution mask.
+    Returns (roi_mask, (x0, y0)), or (None, (0, 0)) for an empty mask.
+    """
+    bx, by, bw, bh = cv2.boundingRect(mask)
+    if bw == 0 or bh == 0:
+        return None, (0, 0)
+
+    col_map = _nearest_index_map(mask.shape[1], out_w)
+    row_map = _nearest_index_map(mask.shape[0], out_h)
+    
+    # Output pixels whose source falls inside the bounding box (maps are monotonic)
+    x0 = max(0, int(np.searchsorted(col_map, bx, side="left")) - margin)
+    x1 = min(out_w, int(np.searchsorted(col_map, bx + bw - 1, side="right")) + margin)
+    y0 = max(0, int(np.searchsorted(row_map, by, side="left")) - margin)
+    y1 = min(out_h, int(np.searchsorted(row_map, by + bh - 1, side="right")) + margin)
+    
+    return mask[np.ix_(row_map[y0:y1], col_map[x0:x1])], (x0, y0)
+
+def measure_calcaneal_pitch(
+    model_mask: np.ndarray, 
+    out_w: int, 
+    out_h: int
+) -> Optional[Tuple[float, Tuple[Tuple[int, int], Tuple[int, int]], Tuple[Tuple[int, int], Tuple[int, int]]]]:
+    """
+    Geometry from a model-resolution mask for an out_w x out_h image.
+    Morphology and contours run on the upscaled bounding-box ROI only; the
+    keypoints are shifted back to image coordinates.
+    Returns (pitch_angle, (pa, pb), ground_points) or None when nothing was segmented.
+    """
+    roi_mask, (x0, y0) = upscale_mask_roi(model_mask, out_w, out_h)
+    if roi_mask is None:
+        return None
+    keypoints = find_calcaneal_keypoints(roi_mask)
+    if keypoints is None:
+        return None
+
+    pa, pb, heel_is_left = keypoints
+    pa = (pa[0] + x0, pa[1] + y0)
+    pb = (pb[0] + x0, pb[1] + y0)
+    pitch_angle, ground_points = calcaneal_pitch_from_keypoints(pa, pb, heel_is_left, out_w)
+    return pitch_angle, (pa, pb), ground_points
+
 class PesPlanusAnalyzer:
-    def __init__(self, model_path: str = "calcaneus_unet_resnet34_best.pth"):
+    def __init__(self, model_path: str = DEFAULT_MODEL_PATH, side_policy: str = SIDE_POLICY_OCR_ALWAYS):
+        import torch
         self.model_path = model_path
+        self.side_policy = side_policy
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         self.model = None
         self.model_input_size = (512, 512)
+        self.timings = StageTimer() # Per-stage timing counters (load, inference, geometry, ocr)
         
         try:
             self._load_model()
@@ -204,6 +295,8 @@ class PesPlanusAnalyzer:
             return
 
         print(f"Model yükleniyor: {self.model_path} ({self.device})...")
+        import torch
+        import segmentation_models_pytorch as smp
         
         self.model = smp.Unet(
             encoder_name="resnet34",
@@ -225,7 +318,8 @@ class PesPlanusAnalyzer:
             print(f"Ağırlıklar yüklenemedi: {e}")
             self.model = None
 
-    def preprocess(self, image: np.ndarray) -> torch.Tensor:
+    def preprocess(self, image: np.ndarray) -> "torch.Tensor":
+        import torch
         resized = cv2.resize(image, self.model_input_size)
         
         # Check if normalization needed (0-255 -> 0-1)
@@ -235,90 +329,227 @@ class PesPlanusAnalyzer:
         tensor = torch.from_numpy(resized).float().unsqueeze(0).unsqueeze(0)
         return tensor
 
-    def analyze(self, image_data: Any) -> Dict[str, Any]:
+    def decode_width(self, side_hint: Optional[str] = None, side_policy: Optional[str] = None) -> int:
         """
-        Main pipeline that calls the new robust algorithm.
+        Narrowest reduced decode the later stages can use. The model only needs
+        MODEL_MIN_SIZE px; the L/R marker search cuts its corner ROIs from a
+        MarkerDetector.WORK_WIDTH px wide frame, so images that may still go
+        through OCR keep that width. (A DICOM laterality tag is only known after
+        the decode, so tag_first without a hint stays at the OCR width.)
+        """
+        if self.needs_ocr({}, side_hint, side_policy):
+            from src.core.marker_detector import MarkerDetector
+            return MarkerDetector.WORK_WIDTH
+        return MODEL_MIN_SIZE
+
+    def load_input(self, image_data: Any, metadata: Optional[Dict[str, str]] = None,
+                   min_width: Optional[int] = None) -> Tuple[Optional[np.ndarray], Dict[str, str], Optional[str]]:
         """
-        # 0. Load Image
-        image = None
+        Stage 0: Resolves a path or array into a grayscale image.
+        Returns (image, metadata, error). Paths are decoded once (pixels + metadata together).
+        min_width: decode large files at 1/2-1/8 scale, no narrower than this
+        (see decode_width); metadata["Original Size"] then holds the full size,
+        which measure() maps the geometry back to.
+        """
+        metadata = metadata or {}
         if isinstance(image_data, str):
-            # Check extension or try divers
-            ext = os.path.splitext(image_data)[1].lower()
-            if ext in ['.dcm', '.dicom']:
-                image, _ = load_dicom_array(image_data)
-            else:
-                image, _ = load_image_array(image_data)
+            with self.timings.stage("load"):
+                image, loaded_meta = load_array(image_data, min_width)
                 
             if image is None:
-                 return {"error": f"Görüntü okunamadı: {image_data}"}
+                 return None, metadata, f"Görüntü okunamadı: {image_data}"
+            return image, loaded_meta or {}, None
                  
-        elif isinstance(image_data, np.ndarray):
+        if isinstance(image_data, np.ndarray):
             if len(image_data.shape) == 3:
                 image = cv2.cvtColor(image_data, cv2.COLOR_BGR2GRAY)
             else:
                 image = image_data
-        else:
-             return {"error": "Geçersiz giriş formatı"}
-             
-        if image is None:
-            return {"error": "Görüntü okunamadı"}
+            return image, metadata, None
 
-        original_h, original_w = image.shape[:2]
+        return None, metadata, "Geçersiz giriş formatı"
 
-        if self.model is None:
-             return {"error": "Model yüklü değil"}
-
-        # 1. Prediction
-        input_tensor = self.preprocess(image).to(self.device)
+    def predict_masks(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Stage 1: Runs one forward pass over a stack of images.
+        Returns one uint8 (0/255) mask per image at model resolution.
+        """
+        import torch
+        start = time.perf_counter()
+        batch = torch.cat([self.preprocess(img) for img in images]).to(self.device)
         
         with torch.no_grad():
-            output = self.model(input_tensor)
+            output = self.model(batch)
             
         mask_tensor = torch.sigmoid(output) > 0.5
-        mask_resized = mask_tensor.squeeze().cpu().numpy().astype(np.uint8) * 255
-            
-        # Resize mask back to original size for analysis
-        mask_original = cv2.resize(mask_resized, (original_w, original_h), interpolation=cv2.INTER_NEAREST)
-        
-        # 2. Call the Algorithm
-        vis_image, angle, calc_pts, ground_pts = analyze_calcaneal_pitch(image, mask_original)
-        
-        # --- OCR Side Detection (New) ---
-        ocr_side = None
+        masks = mask_tensor[:, 0].cpu().numpy().astype(np.uint8) * 255
+        self.timings.add("inference", time.perf_counter() - start, count=len(images))
+        return list(masks)
+
+    def predict_masks_each(self, images: List[np.ndarray]) -> List[Optional[np.ndarray]]:
+        """
+        predict_masks() that isolates failures: if the stacked pass raises,
+        the images are retried one at a time so only the bad input gets None.
+        """
         try:
-             from src.core.marker_detector import MarkerDetector
-             # Use the original full-size image
-             ocr_side = MarkerDetector.detect_side(image)
+            return self.predict_masks(images)
         except Exception as e:
-             print(f"OCR Detection failed: {e}")
-        
-        # 3. Side Detection Logic
-        # Priority 1: OCR (Marker on Image)
-        # Priority 2: DICOM Tag (0020, 0060)
-        # Priority 3: Anatomical (Heel Position)
+            if len(images) == 1:
+                print(f"Tahmin hatası: {e}")
+                return [None]
+            print(f"Toplu tahmin hatası, görüntüler tek tek deneniyor: {e}")
+        masks = []
+        for image in images:
+            try:
+                masks.append(self.predict_masks([image])[0])
+            except Exception as e:
+                print(f"Tahmin hatası: {e}")
+                masks.append(None)
+        return masks
+
+    def measure(self, image: np.ndarray, mask_resized: np.ndarray, render: bool = False,
+                full_size: Optional[Tuple[int, int]] = None) -> Tuple[Optional[np.ndarray], float, Any, Any]:
+        """
+        Stage 2: Geometry for one image. Returns (vis_image, angle, calc_pts, ground_pts).
+        vis_image is None unless render=True (the BGR copy is the costliest part on large studies).
+        full_size: (w, h) of the original study when image is a reduced decode;
+        points are then in original-image coordinates.
+        """
+        original_h, original_w = image.shape[:2]
+        if full_size:
+            original_w, original_h = full_size
+
+        with self.timings.stage("geometry"):
+            # 2. Call the Algorithm (on the mask's bounding-box ROI, no full-size resize)
+            measured = measure_calcaneal_pitch(mask_resized, original_w, original_h)
+            if measured is None:
+                angle, calc_pts, ground_pts = 0.0, ((0, 0), (0, 0)), ((0, 0), (0, 0))
+            else:
+                angle, calc_pts, ground_pts = measured
+
+        vis_image = None
+        if render:
+            with self.timings.stage("render"):
+                if image.shape[1] != original_w or image.shape[0] != original_h:
+                    image = cv2.resize(image, (original_w, original_h), interpolation=cv2.INTER_LINEAR)
+                vis_image = self.render(image, angle, calc_pts, ground_pts, measured is not None)
+        return vis_image, angle, calc_pts, ground_pts
+
+    @staticmethod
+    def render(image: np.ndarray, angle: float, calc_pts: Any, ground_pts: Any, found: bool = True) -> np.ndarray:
+        """Draws the measurement on a BGR copy of the image (a plain copy when nothing was found)."""
+        if not found:
+            return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR) if len(image.shape) == 2 else image.copy()
+        return render_calcaneal_pitch(image, angle, calc_pts, ground_pts)
+
+    def needs_ocr(self, metadata: Dict[str, str], side_hint: Optional[str] = None, side_policy: Optional[str] = None) -> bool:
+        """True if OCR could change the resolved side under the given policy."""
+        policy = side_policy or self.side_policy
+        if policy == SIDE_POLICY_OCR_OFF:
+            return False
+        if policy == SIDE_POLICY_TAG_FIRST:
+            return not (_valid_side(metadata.get("Laterality")) or _valid_side(side_hint))
+        return True
+
+    def postprocess(self, image: np.ndarray, mask_resized: np.ndarray, metadata: Dict[str, str],
+                    side_hint: Optional[str] = None, side_policy: Optional[str] = None,
+                    render: bool = False) -> Dict[str, Any]:
+        """
+        Stages 2-5: Geometry, OCR side detection and classification for one image.
+        """
+        measurement = self.measure(image, mask_resized, render, metadata.get("Original Size"))
         
-        predicted_side = "?"
+        # --- OCR Side Detection (skipped when the policy cannot use it) ---
+        ocr_side = None
+        if self.needs_ocr(metadata, side_hint, side_policy):
+            try:
+                 from src.core.marker_detector import MarkerDetector
+                 # Use the original full-size image
+                 with self.timings.stage("ocr"):
+                     ocr_side = MarkerDetector.detect_side(image)
+            except Exception as e:
+                 print(f"OCR Detection failed: {e}")
 
-        # Re-check loading to be safe about metadata availability
-        metadata = {}
-        if isinstance(image_data, str) and (image_data.lower().endswith('.dcm') or image_data.lower().endswith('.dicom')):
-             _, metadata = load_dicom_array(image_data)
+        return self.finalize(measurement, ocr_side, metadata, side_hint, side_policy)
 
-        if ocr_side in ["L", "R"]:
-            predicted_side = ocr_side
-        elif "Laterality" in metadata and metadata["Laterality"] in ["L", "R"]:
-            predicted_side = metadata["Laterality"]
+    def postprocess_many(self, images: List[np.ndarray], masks: List[np.ndarray], metadatas: List[Dict[str, str]],
+                         side_hints: Optional[List[Optional[str]]] = None, side_policy: Optional[str] = None,
+                         render: bool = False) -> List[Dict[str, Any]]:
+        """
+        postprocess() for a whole inference batch: geometry per image, one
+        batched OCR pass for the images that need it, then side resolution/classification.
+        """
+        side_hints = side_hints or [None] * len(images)
+        results = [None] * len(images)
+        measured = {}
+        for idx, (image, mask) in enumerate(zip(images, masks)):
+            try:
+                measured[idx] = self.measure(image, mask, render, metadatas[idx].get("Original Size"))
+            except Exception as e:
+                results[idx] = {"error": str(e)}
+
+        ocr_sides = [None] * len(images)
+        order = [idx for idx in sorted(measured) if self.needs_ocr(metadatas[idx], side_hints[idx], side_policy)]
+        if order:
+            try:
+                 from src.core.marker_detector import MarkerDetector
+                 start = time.perf_counter()
+                 for idx, side in zip(order, MarkerDetector.detect_sides([images[k] for k in order])):
+                     ocr_sides[idx] = side
+                 self.timings.add("ocr", time.perf_counter() - start, count=len(order))
+            except Exception as e:
+                 print(f"OCR Detection failed: {e}")
+
+        for idx, measurement in measured.items():
+            try:
+                results[idx] = self.finalize(measurement, ocr_sides[idx], metadatas[idx], side_hints[idx], side_policy)
+            except Exception as e:
+                results[idx] = {"error": str(e)}
+        return results
+
+    def resolve_side(self, ocr_side: Optional[str], metadata: Dict[str, str], side_hint: Optional[str],
+                     calc_pts: Any, side_policy: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Picks the side from the first valid source allowed by the policy.
+        Returns (side, source) where source is ocr / filename / tag / anatomy.
+        """
+        policy = side_policy or self.side_policy
+        tag = ("tag", _valid_side(metadata.get("Laterality")))
+        hint = ("filename", _valid_side(side_hint))
+        ocr = ("ocr", _valid_side(ocr_side))
+        if policy == SIDE_POLICY_TAG_FIRST:
+            sources = [tag, hint, ocr]
+        elif policy == SIDE_POLICY_OCR_OFF:
+            sources = [tag, hint]
+        else:
+            sources = [ocr, hint, tag]
+
+        for source, side in sources:
+            if side:
+                return side, source
+
+        # Last resort: Anatomical (Heel Position)
+        # calc_pts = (Point A (Heel), Point B (Ant))
+        pa = calc_pts[0]
+        pb = calc_pts[1]
+        
+        if pa[0] < pb[0]:
+            predicted_side = "R" # Sağ (Topuk Solda -> Parmaklar Sağda -> Sağ Ayak)
         else:
-             # Priority 3: Anatomical (Heel Position)
-             # calc_pts = (Point A (Heel), Point B (Ant))
-             pa = calc_pts[0]
-             pb = calc_pts[1]
-             
-             if pa[0] < pb[0]:
-                 predicted_side = "R" # Sağ (Topuk Solda -> Parmaklar Sağda -> Sağ Ayak)
-             else:
-                 predicted_side = "L" # Sol (Topuk Sağda -> Parmaklar Solda -> Sol Ayak)
-             print(f"Side inferred from Anatomy: {predicted_side}")
+            predicted_side = "L" # Sol (Topuk Sağda -> Parmaklar Solda -> Sol Ayak)
+        print(f"Side inferred from Anatomy: {predicted_side}")
+        return predicted_side, "anatomy"
+
+    def finalize(self, measurement: Tuple[np.ndarray, float, Any, Any], ocr_side: Optional[str], metadata: Dict[str, str],
+                 side_hint: Optional[str] = None, side_policy: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Stages 3-5: Side resolution, classification and the result dict.
+        "visualized_image" is only included when the measurement was rendered.
+        """
+        vis_image, angle, calc_pts, ground_pts = measurement
+
+        # 3. Side Detection Logic (order depends on side_policy)
+        predicted_side, side_source = self.resolve_side(ocr_side, metadata, side_hint, calc_pts, side_policy)
 
         # 4. Classify
         # <15: Pes Planus, 15-20: Borderline, 20-30: Normal, >30: Pes Cavus (Approx)
@@ -336,12 +567,120 @@ class PesPlanusAnalyzer:
              color = "#ff0000"
 
         # 5. Prepare Result
-        return {
+        result = {
             "angle": angle,
             "diagnosis": cat,
             "raw_color": color, 
             "lines": [calc_pts, ground_pts], # For Canvas UI
-            "visualized_image": vis_image,    # For debugging or display if needed
             "side": predicted_side,
+            "side_source": side_source,
             "ocr_side": ocr_side
-        }
\ No newline at end of file
+        }
+        if vis_image is not None:
+            result["visualized_image"] = vis_image # For debugging or display if needed
+        return result
+
+    def analyze(self, image_data: Any, metadata: Optional[Dict[str, str]] = None,
+                side_hint: Optional[str] = None, side_policy: Optional[str] = None,
+                progress: Optional[Callable[[str], None]] = None,
+                should_cancel: Optional[Callable[[], bool]] = None,
+                render: bool = True) -> Dict[str, Any]:
+        """
+        Main pipeline that calls the new robust algorithm.
+        image_data: file path or numpy array. For arrays, metadata (e.g. from
+        load_dicom_array) can be passed so the file is not decoded again.
+        side_hint: early side guess (e.g. BatchItem filename heuristics).
+        progress: called with the stage name (load, segment, geometry, ocr) as each starts.
+        should_cancel: polled between stages; a cancelled run returns {"error", "cancelled": True}.
+        render: False skips the "visualized_image" overlay (numbers and points only;
+        the canvas and report draw result["lines"] themselves). Unrendered path
+        inputs are also decoded at reduced resolution (see load_input).
+        """
+        def begin(stage):
+            if should_cancel and should_cancel():
+                return False
+            if progress:
+                progress(stage)
+            return True
+
+        cancelled = {"error": "Analiz iptal edildi", "cancelled": True}
+
+        if not begin("load"):
+            return cancelled
+        min_width = None if render else self.decode_width(side_hint, side_policy)
+        image, metadata, error = self.load_input(image_data, metadata, min_width)
+        if error:
+            return {"error": error}
+
+        if self.model is None:
+             return {"error": "Model yüklü değil"}
+
+        if not begin("segment"):
+            return cancelled
+        mask = self.predict_masks([image])[0]
+
+        if not begin("geometry"):
+            return cancelled
+        measurement = self.measure(image, mask, render, metadata.get("Original Size"))
+
+        ocr_side = None
+        if self.needs_ocr(metadata, side_hint, side_policy):
+            if not begin("ocr"):
+                return cancelled
+            try:
+                 from src.core.marker_detector import MarkerDetector
+                 with self.timings.stage("ocr"):
+                     ocr_side = MarkerDetector.detect_side(image, should_cancel=should_cancel)
+            except Exception as e:
+                 print(f"OCR Detection failed: {e}")
+            if should_cancel and should_cancel():
+                return cancelled
+
+        return self.finalize(measurement, ocr_side, metadata, side_hint, side_policy)
+
+    def analyze_many(self, paths: List[str], batch_size: int = 8, side_hints: Optional[List[Optional[str]]] = None,
+                     side_policy: Optional[str] = None, render: bool = False) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Batched variant of analyze() for many files.
+        Images are stacked into one forward pass per batch; yields (path, result)
+        in input order so callers can stream progress. Results are not rendered
+        unless render=True; unrendered runs decode at reduced resolution.
+        """
+        batch_size = max(1, int(batch_size))
+        side_hints = side_hints or [None] * len(paths)
+        for start in range(0, len(paths), batch_size):
+            chunk = paths[start:start + batch_size]
+            hints = side_hints[start:start + batch_size]
+            loaded = [self.load_input(p, min_width=None if render else self.decode_width(hint, side_policy))
+                      for p, hint in zip(chunk, hints)]
+            
+            masks = {}
+            valid = [idx for idx, (_, _, error) in enumerate(loaded) if not error]
+            if valid and self.model is not None:
+                predicted = self.predict_masks_each([loaded[idx][0] for idx in valid])
+                masks = {idx: mask for idx, mask in zip(valid, predicted) if mask is not None}
+                    
+            ready = sorted(masks)
+            try:
+                processed = self.postprocess_many(
+                    [loaded[idx][0] for idx in ready],
+                    [masks[idx] for idx in ready],
+                    [loaded[idx][1] for idx in ready],
+                    [hints[idx] for idx in ready],
+                    side_policy,
+                    render,
+                )
+            except Exception as e:
+                processed = [{"error": str(e)} for _ in ready]
+            processed = dict(zip(ready, processed))
+                    
+            for idx, path in enumerate(chunk):
+                error = loaded[idx][2]
+                if error:
+                    yield path, {"error": error}
+                elif self.model is None:
+                    yield path, {"error": "Model yüklü değil"}
+                elif idx not in processed:
+                    yield path, {"error": "Model tahmini başarısız"}
+                else:
+                    yield path, processed[idx]
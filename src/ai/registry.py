@@ -0,0 +1,57 @@
+import threading
+from src.ai.analyzer import PesPlanusAnalyzer, DEFAULT_MODEL_PATH
+
+# Process-wide analyzer shared by the single-image tab, batch tab and review dialog
+_analyzer = None
+_lock = threading.Lock()
+_warmup_thread = None
+
+
+def get_analyzer(model_path=DEFAULT_MODEL_PATH):
+    """
+    Returns the shared analyzer, loading the weights on first use.
+    Blocks while a background warm-up is still in progress.
+    """
+    global _analyzer
+    with _lock:
+        if _analyzer is None:
+            _analyzer = PesPlanusAnalyzer(model_path)
+        return _analyzer
+
+
+def is_ready():
+    return _analyzer is not None
+
+
+def wait_for_warm_up(should_cancel, interval=0.1):
+    """
+    Waits for a running background warm-up, returning early once
+    should_cancel() is true (get_analyzer() itself cannot be interrupted).
+    """
+    thread = _warmup_thread
+    while thread is not None and thread.is_alive() and _analyzer is None and not should_cancel():
+        thread.join(interval)
+
+
+def warm_up(model_path=DEFAULT_MODEL_PATH, callback=None):
+    """
+    Loads the shared analyzer in a background thread.
+    callback(ok: bool) is called from that thread when loading ends.
+    """
+    global _warmup_thread
+
+    def _run():
+        try:
+            analyzer = get_analyzer(model_path)
+            ok = analyzer.model is not None
+        except Exception as e:
+            print(f"Model ön yükleme hatası: {e}")
+            ok = False
+        if callback:
+            callback(ok)
+
+    with _lock:
+        if _warmup_thread is not None:
+            return
+        _warmup_thread = threading.Thread(target=_run, name="analyzer-warmup", daemon=True)
+    _warmup_thread.start()
@@ -0,0 +1,191 @@
+import os
+import re
+
+# Files picked up by folder scans (GUI and command line)
+IMAGE_EXTENSIONS = {'.dcm', '.dicom', '.jpg', '.jpeg', '.png', '.bmp'}
+
+class BatchItem:
+    def __init__(self, path):
+        self.path = path
+        self.filename = os.path.basename(path)
+        self.status = "Bekliyor" # Bekliyor, İşleniyor, Tamamlandı, Hata (İptal: CLI run interrupted)
+        self.patient_name = ""
+        self.patient_id = ""
+        self.side = "" # L veya R
+        self.ocr_side = None # Side read from the L/R marker on the image
+        self.angle = 0.0
+        self.diagnosis = ""
+        self.lines = [] # Analysis lines for correction
+        self.is_confirmed = False
+        self.error_msg = ""
+        
+        self.parse_metadata()
+
+    def parse_metadata(self):
+        """
+        Attempts to extract metadata from filename AND folder structure.
+        Priority:
+        1. Folder Structure (e.g. test/NAME_ID/SUBFOLDER/file.dcm) for Name & ID.
+             - Traverse parents up to find "Name..._ID..." pattern.
+        2. Filename for Side (L/R) or Name if folder fails.
+        """
+        try:
+            # 1. Path Analysis for Name & ID
+            path_parts = os.path.normpath(self.path).split(os.sep)
+            
+            # Strategy: Look for the parent that has a long number at the end (ID)
+            # User Pattern: NAME SURNAME_ID
+            # Regex: Capture everything before last underscore as Name, digits after as ID.
+            
+            # Words that indicate a Protocol/View name, NOT a patient name
+            PROTOCOL_KEYWORDS = ["AYAK", "BASARAK", "YON", "VIEW", "LAT", "AP", "SAG", "SOL", "RIGHT", "LEFT", "TEST", "STUDY", "SERIES"]
+
+            found_metadata = False
+            # Iterate parts excluding filename, bottom-up
+            # e.g. [..., "AHMET_123", "AYAK_BASARAK_123", "file.dcm"] -> Check "AYAK..." then "AHMET..."
+            for part in reversed(path_parts[:-1]): 
+                 # Cleaning
+                 part_clean = part.replace('^', ' ').strip()
+                 
+                 # Regex: Match (Any Text) _ (Digits 5+)
+                 # This handles "AHMET EMIR DENIZ_10216976372"
+                 match = re.search(r'(.+)_(\d{5,})$', part_clean)
+                 if match:
+                     raw_name = match.group(1).strip()
+                     raw_id = match.group(2)
+                     
+                     # Clean Name (remove ^, extra spaces, Title Case)
+                     name_clean = re.sub(r'\s+', ' ', raw_name.replace('^', ' ')).strip().title()
+                     
+                     # Filter: Check if this "Name" is actually a Protocol description
+                     # Check against blacklist
+                     is_protocol = any(k in name_clean.upper() for k in PROTOCOL_KEYWORDS)
+                     
+                     if is_protocol:
+                         # Likely a protocol folder (e.g. "Ayak Basarak 2 Yon"), continue searching up
+                         continue
+                     
+                     self.patient_name = name_clean
+                     self.patient_id = raw_id
+                     found_metadata = True
+                     break
+            
+            # Fallback if no folder pattern found
+            if not found_metadata:
+                # Use filename or immediate parent as name, but ensure not empty
+                name_cand = os.path.splitext(self.filename)[0]
+                # If filename is just numbers or generic, try parent
+                if name_cand.isdigit() or len(name_cand) < 3:
+                     if len(path_parts) > 1:
+                         name_cand = path_parts[-2] # Immediate parent
+                
+                self.patient_name = name_cand.replace('^', ' ').replace('_', ' ').title()
+                self.patient_id = "?"
+                
+            # 2. Side Detection (Filename/Path Heuristic - Fallback)
+            # This will be overwritten by DICOM or Analysis later, but good to have initial guess.
+            if self.side in ["", "?"]:
+                full_check = self.path.upper()
+                # Check specifics first
+                # Stricter Check: Require boundaries or underscores to avoid partial matches
+                # e.g. "MESAJ" should not match "SAG"
+                # Search for "_L_", "_LEFT", " LEFT ", "SOL" (whole word) etc.
+                
+                # Regex for LEFT: (underscore or space or start) + (L|LEFT|SOL) + (underscore or space or end)
+                if re.search(r'(?:^|[_\s])(L|LEFT|SOL)(?:$|[_\s])', full_check):
+                    self.side = "L"
+                elif re.search(r'(?:^|[_\s])(R|RIGHT|SAG|SAĞ)(?:$|[_\s])', full_check):
+                    self.side = "R"
+                
+        except Exception as e:
+            print(f"Metadata Parse Error: {e}")
+            self.patient_name = self.filename
+            self.patient_id = "-"
+            self.side = "-"
+
+    def apply_dicom_header(self, metadata):
+        """
+        Replaces the folder/filename guesses with the DICOM tags where present
+        (metadata as returned by read_dicom_header).
+        """
+        def tag(key):
+            value = str(metadata.get(key, "") or "").strip()
+            return "" if value in ("N/A", "None") else value
+
+        name = tag("Patient Name")
+        if name:
+            self.patient_name = re.sub(r'\s+', ' ', name.replace('^', ' ')).strip().title()
+        patient_id = tag("Patient ID")
+        if patient_id:
+            self.patient_id = patient_id
+        side = tag("Laterality").upper()
+        if side in ("L", "R"):
+            self.side = side
+
+    def apply_result(self, result):
+        """Copies an analyzer result dict onto this item."""
+        if "error" in result:
+            self.status = "Hata"
+            self.error_msg = result["error"]
+            return
+
+        self.status = "Tamamlandı"
+        self.angle = result["angle"]
+        self.diagnosis = result["diagnosis"]
+        self.lines = result["lines"]
+        self.ocr_side = result.get("ocr_side", None)
+
+        # Analyzer already weighed OCR, filename hint (self.side), DICOM tag and anatomy
+        if result.get("side") not in [None, "?", ""]:
+            self.side = result["side"]
+
+
+def item_record(item):
+    """Plain-dict snapshot of a BatchItem (one line of a streamed result file)."""
+    return {
+        "path": item.path,
+        "filename": item.filename,
+        "patient_id": item.patient_id,
+        "patient_name": item.patient_name,
+        "side": item.side,
+        "ocr_side": item.ocr_side,
+        "angle": float(item.angle),
+        "diagnosis": item.diagnosis,
+        "status": item.status,
+        "is_confirmed": bool(item.is_confirmed),
+        "error": item.error_msg,
+        "lines": [[list(pt) for pt in line] for line in item.lines],
+    }
+
+
+def record_row(record):
+    """Export table row (Excel/CSV/JSON headers) for an item_record dict."""
+    return {
+        "Dosya Adı": record["filename"],
+        "Hasta ID": record["patient_id"],
+        "Dizi Adı": record["patient_name"],
+        "Taraf": record["side"],
+        "Açı": record["angle"],
+        "Tanı": record["diagnosis"],
+        "Durum": record["status"],
+        "Onaylandı": "Evet" if record["is_confirmed"] else "Hayır"
+    }
+
+
+def sort_rows(data):
+    """Custom Sort: ID/Name Ascending, Side Descending (R first)."""
+    # Let's use a lambda: (Name, 0 if R else 1)
+    data.sort(key=lambda x: (
+        x["Dizi Adı"], 
+        x["Hasta ID"],
+        0 if x["Taraf"] in ["R", "Right", "Sag", "Sağ"] else 1
+    ))
+    return data
+
+
+def export_rows(items):
+    """
+    Result table rows for Excel/CSV/JSON export.
+    Sorted by name and ID, right side first within a patient.
+    """
+    return sort_rows([record_row(item_record(item)) for item in items])
@@ -1,182 +1,34 @@
-import os
-import re
-from PySide6.QtCore import QObject, QThread, Signal
-from src.ai.analyzer import PesPlanusAnalyzer
-
-class BatchItem:
-    def __init__(self, path):
-        self.path = path
-        self.filename = os.path.basename(path)
-        self.status = "Bekliyor" # Bekliyor, İşleniyor, Tamamlandı, Hata
-        self.patient_name = ""
-        self.patient_id = ""
-        self.side = "" # L veya R
-        self.angle = 0.0
-        self.diagnosis = ""
-        self.lines = [] # Analysis lines for correction
-        self.is_confirmed = False
-        self.error_msg = ""
-        
-        self.parse_metadata()
-
-    def parse_metadata(self):
-        """
-        Attempts to extract metadata from filename AND folder structure.
-        Priority:
-        1. Folder Structure (e.g. test/NAME_ID/SUBFOLDER/file.dcm) for Name & ID.
-             - Traverse parents up to find "Name..._ID..." pattern.
-        2. Filename for Side (L/R) or Name if folder fails.
-        """
-        try:
-            # 1. Path Analysis for Name & ID
-            path_parts = os.path.normpath(self.path).split(os.sep)
-            
-            # Strategy: Look for the parent that has a long number at the end (ID)
-            # User Pattern: NAME SURNAME_ID
-            # Regex: Capture everything before last underscore as Name, digits after as ID.
-            
-            # Words that indicate a Protocol/View name, NOT a patient name
-            PROTOCOL_KEYWORDS = ["AYAK", "BASARAK", "YON", "VIEW", "LAT", "AP", "SAG", "SOL", "RIGHT", "LEFT", "TEST", "STUDY", "SERIES"]
-
-            found_metadata = False
-            # Iterate parts excluding filename, bottom-up
-            # e.g. [..., "AHMET_123", "AYAK_BASARAK_123", "file.dcm"] -> Check "AYAK..." then "AHMET..."
-            for part in reversed(path_parts[:-1]): 
-                 # Cleaning
-                 part_clean = part.replace('^', ' ').strip()
-                 
-                 # Regex: Match (Any Text) _ (Digits 5+)
-                 # This handles "AHMET EMIR DENIZ_10216976372"
-                 match = re.search(r'(.+)_(\d{5,})$', part_clean)
-                 if match:
-                     raw_name = match.group(1).strip()
-                     raw_id = match.group(2)
-                     
-                     # Clean Name (remove ^, extra spaces, Title Case)
-                     name_clean = re.sub(r'\s+', ' ', raw_name.replace('^', ' ')).strip().title()
-                     
-                     # Filter: Check if this "Name" is actually a Protocol description
-                     # Check against blacklist
-                     is_protocol = any(k in name_clean.upper() for k in PROTOCOL_KEYWORDS)
-                     
-                     if is_protocol:
-                         # Likely a protocol folder (e.g. "Ayak Basarak 2 Yon"), continue searching up
-                         continue
-                     
-                     self.patient_name = name_clean
-                     self.patient_id = raw_id
-                     found_metadata = True
-                     break
-            
-            # Fallback if no folder pattern found
-            if not found_metadata:
-                # Use filename or immediate parent as name, but ensure not empty
-                name_cand = os.path.splitext(self.filename)[0]
-                # If filename is just numbers or generic, try parent
-                if name_cand.isdigit() or len(name_cand) < 3:
-                     if len(path_parts) > 1:
-                         name_cand = path_parts[-2] # Immediate parent
-                
-                self.patient_name = name_cand.replace('^', ' ').replace('_', ' ').title()
-                self.patient_id = "?"
-                
-            # 2. Side Detection (Filename/Path Heuristic - Fallback)
-            # This will be overwritten by DICOM or Analysis later, but good to have initial guess.
-            if self.side in ["", "?"]:
-                full_check = self.path.upper()
-                # Check specifics first
-                # Stricter Check: Require boundaries or underscores to avoid partial matches
-                # e.g. "MESAJ" should not match "SAG"
-                # Search for "_L_", "_LEFT", " LEFT ", "SOL" (whole word) etc.
-                
-                # Regex for LEFT: (underscore or space or start) + (L|LEFT|SOL) + (underscore or space or end)
-                if re.search(r'(?:^|[_\s])(L|LEFT|SOL)(?:$|[_\s])', full_check):
-                    self.side = "L"
-                elif re.search(r'(?:^|[_\s])(R|RIGHT|SAG|SAĞ)(?:$|[_\s])', full_check):
-                    self.side = "R"
-                
-        except Exception as e:
-            print(f"Metadata Parse Error: {e}")
-            self.patient_name = self.filename
-            self.patient_id = "-"
-            self.side = "-"
+from PySide6.QtCore import QThread, Signal
+from src.core.batch_item import BatchItem
+from src.core.batch_runner import BatchRunner
 
 class BatchWorker(QThread):
     progress = Signal(int, int) # current, total
     item_finished = Signal(str, object) # path, BatchItem (updated)
     finished_all = Signal()
     
-    def __init__(self, items, analyzer=None):
+    def __init__(self, items, analyzer=None, batch_size=8, decode_workers=None, post_workers=None,
+                 mode="thread", workers=None, cache=None, side_policy=None):
         super().__init__()
         self.items = items # List of BatchItem
-        self.analyzer = analyzer or PesPlanusAnalyzer()
-        self.is_running = True
+        # The analysis itself is Qt-free (also used by batch_cli.py); signals are emitted from run()
+        self.runner = BatchRunner(
+            items,
+            analyzer=analyzer,
+            batch_size=batch_size,
+            decode_workers=decode_workers,
+            post_workers=post_workers,
+            mode=mode,
+            workers=workers,
+            cache=cache,
+            side_policy=side_policy,
+            on_item=lambda item: self.item_finished.emit(item.path, item),
+            on_progress=self.progress.emit,
+        )
 
     def run(self):
-        total = len(self.items)
-        for i, item in enumerate(self.items):
-            if not self.is_running:
-                break
-                
-            if item.status == "Tamamlandı" or item.status == "Hata":
-                self.progress.emit(i+1, total)
-                continue
-                
-            try:
-                item.status = "İşleniyor"
-                result = self.analyzer.analyze(item.path)
-                
-                if "error" in result:
-                    item.status = "Hata"
-                    item.error_msg = result["error"]
-                else:
-                    item.status = "Tamamlandı"
-                    item.angle = result["angle"]
-                    item.diagnosis = result["diagnosis"]
-                    item.lines = result["lines"]
-                    # 0. OCR Side Detection (Highest Priority)
-                    try:
-                        from src.core.marker_detector import MarkerDetector
-                        # We need the image array for OCR. 
-                        # Result has "visualized_image" but that might be modified. 
-                        # It's better to load cleaned image or use what analyzer has.
-                        # Since analyzer loads image, let's ask analyzer to return raw image or implement OCR inside analyzer?
-                        # ACTUALLY: Let's do it here. We need to load image. But Analyzer already loaded it.
-                        # Optimization: Let analyzer return 'original_image' or do OCR inside analyzer.
-                        # Current Plan: Do it here for now using analyzer's loading if accessible or reload (inefficient).
-                        # BETTER: Update Analyzer to return 'ocr_side' or pass image to detector.
-                        
-                        # Let's simple load it here if needed, or better, perform OCR inside Analyzer.
-                        # Wait, doing it inside Analyzer is cleaner.
-                        pass
-                    except:
-                        pass
-
-                    if "side" in result and result["side"] not in ["?", ""]:
-                        # Priority Logic:
-                        # 1. OCR (To be implemented inside Analyzer for efficiency)
-                        # 2. Metadata (Filename)
-                        # 3. Geometric
-                        
-                        # Current logic was: Metadata > Geometric
-                        # New logic needed: OCR > Metadata > Geometric
-                        
-                        # Since I decided to move OCR to Analyzer for image access efficiency:
-                        # If Analyzer returns "ocr_side", use it.
-                        ocr_side = result.get("ocr_side", None)
-                        
-                        if ocr_side:
-                            item.side = ocr_side
-                        elif item.side not in ["L", "R"]:
-                             item.side = result["side"]
-            except Exception as e:
-                item.status = "Hata"
-                item.error_msg = str(e)
-                
-            self.item_finished.emit(item.path, item)
-            self.progress.emit(i+1, total)
-            
+        self.runner.run()
         self.finished_all.emit()
 
     def stop(self):
-        self.is_running = False
+        self.runner.stop()
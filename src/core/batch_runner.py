@@ -0,0 +1,112 @@
+from src.ai.analyzer import DEFAULT_MODEL_PATH
+from src.ai.registry import get_analyzer
+from src.core.pipeline import AnalysisPipeline
+from src.core.process_pool import ProcessPoolRunner
+
+
+class BatchRunner:
+    """
+    Qt-free batch analysis over a list of BatchItems.
+    Used by BatchWorker (GUI) and batch_cli.py (headless). Callbacks run on
+    the thread that calls run():
+        on_item(item)            after an item got its result (or a cache hit)
+        on_progress(done, total) after every finished or skipped item
+    """
+
+    def __init__(self, items, analyzer=None, batch_size=8, decode_workers=None, post_workers=None,
+                 mode="thread", workers=None, cache=None, side_policy=None,
+                 on_item=None, on_progress=None, model_path=DEFAULT_MODEL_PATH):
+        self.items = items # List of BatchItem
+        self.mode = mode # "thread": in-process pipeline, "process": one model per worker process
+        self.analyzer = analyzer # None: shared analyzer, resolved in run()
+        self.model_path = model_path # Weights for process workers when no analyzer is given
+        self.batch_size = batch_size # Images per U-Net forward pass
+        default_decode, default_post = AnalysisPipeline.default_workers()
+        self.decode_workers = decode_workers or default_decode
+        self.post_workers = post_workers or default_post
+        self.workers = workers # Process count (process mode), defaults to all cores
+        self.cache = cache # Optional ResultCache: hits are skipped, new results stored
+        self.side_policy = side_policy # None: analyzer default (see SIDE_POLICIES)
+        self.on_item = on_item
+        self.on_progress = on_progress
+        self.timings = None # StageTimer of the last run
+        self.cache_hits = 0 # Items of the last run answered from the cache
+        self.is_running = True
+
+    def create_runner(self):
+        if self.mode == "process":
+            model_path = self.analyzer.model_path if self.analyzer else self.model_path
+            return ProcessPoolRunner(model_path, workers=self.workers, batch_size=self.batch_size)
+        return AnalysisPipeline(
+            self.analyzer,
+            batch_size=self.batch_size,
+            decode_workers=self.decode_workers,
+            post_workers=self.post_workers,
+        )
+
+    def _item_done(self, item, done, total):
+        if self.on_item:
+            self.on_item(item)
+        if self.on_progress:
+            self.on_progress(done, total)
+
+    def run(self):
+        """Analyzes all pending items; blocks until finished or stop() is called."""
+        self.is_running = True
+        if self.analyzer is None and self.mode != "process":
+            self.analyzer = get_analyzer()
+        total = len(self.items)
+        done = 0
+        self.cache_hits = 0
+        pending = []
+        for item in self.items:
+            if item.status == "Tamamlandı" or item.status == "Hata":
+                done += 1
+                if self.on_progress:
+                    self.on_progress(done, total)
+            elif self.cache and self.cache.apply(item):
+                done += 1
+                self.cache_hits += 1
+                self._item_done(item, done, total)
+            else:
+                pending.append(item)
+
+        # Decode, inference and post-processing overlap; results arrive out of order
+        runner = self.create_runner()
+
+        def on_result(idx, path, result):
+            nonlocal done
+            item = pending[idx]
+            try:
+                item.apply_result(result)
+                if self.cache:
+                    self.cache.put(item)
+            except Exception as e:
+                item.status = "Hata"
+                item.error_msg = str(e)
+            done += 1
+            self._item_done(item, done, total)
+
+        for item in pending:
+            item.status = "İşleniyor"
+        try:
+            runner.run(
+                [item.path for item in pending],
+                on_result,
+                should_stop=lambda: not self.is_running,
+                side_hints=[item.side for item in pending], # Filename/folder heuristics as an early source
+                side_policy=self.side_policy,
+            )
+        finally:
+            # Items never reached because of a stop (or Ctrl-C) go back to the queue
+            for item in pending:
+                if item.status == "İşleniyor":
+                    item.status = "Bekliyor"
+
+            self.timings = runner.timings if self.mode == "process" else self.analyzer.timings
+            print(f"Toplu analiz aşama süreleri:\n{self.timings.summary()}")
+            from src.core.marker_detector import MarkerDetector
+            MarkerDetector.save_stats() # Variant ordering carries over to the next run (process mode merges worker hits)
+
+    def stop(self):
+        self.is_running = False
@@ -1,64 +1,185 @@
 import os
-import pydicom
 import numpy as np
-from PIL import Image
 
-def load_dicom_array(dicom_path):
+def _window_range(wc, ww):
+    # Handle MultiValue (list-like)
+    if hasattr(wc, '__iter__') and not isinstance(wc, (str, float, int)): wc = wc[0]
+    if hasattr(ww, '__iter__') and not isinstance(ww, (str, float, int)): ww = ww[0]
+    return float(wc) - (float(ww) / 2), float(wc) + (float(ww) / 2)
+
+def window_lut(dtype, slope, intercept, min_val, max_val):
+    """
+    uint8 lookup table over every value of an 8/16-bit integer dtype, covering
+    rescale, window clipping and 0-255 normalization. Entries are computed in
+    float64 exactly like the per-pixel formula, so the result is bit-identical.
+    Indexed by the unsigned view of the pixel data (see window_to_uint8).
+    """
+    info = np.iinfo(dtype)
+    n = 1 << (8 * np.dtype(dtype).itemsize)
+    values = np.arange(n, dtype=np.int64)
+    if info.min < 0:
+        values[values > info.max] -= n # Two's complement order of the unsigned view
+    rescaled = values * slope + intercept
+    if max_val == min_val:
+        return np.zeros(n, np.uint8)
+    rescaled = np.clip(rescaled, min_val, max_val)
+    return np.uint8((rescaled - min_val) / (max_val - min_val) * 255.0)
+
+def window_to_uint8(pixel_array, slope=1.0, intercept=0.0, window=None):
+    """
+    Rescale + VOI window + normalize to uint8.
+    window: (min_val, max_val) from WindowCenter/Width, or None for the
+    full range of the rescaled data.
+    8/16-bit integer data (all DR/CR in practice) goes through one LUT pass
+    with no full-size float temporaries; anything else uses a float32 path.
+    """
+    slope = float(slope)
+    intercept = float(intercept)
+    if pixel_array.dtype.kind in "iu" and pixel_array.dtype.itemsize <= 2:
+        if window is None:
+            # Rescale is monotonic, so the extremes map from the raw extremes
+            ends = (float(pixel_array.min()) * slope + intercept, float(pixel_array.max()) * slope + intercept)
+            window = (min(ends), max(ends))
+        lut = window_lut(pixel_array.dtype, slope, intercept, *window)
+        unsigned = np.dtype(f"u{pixel_array.dtype.itemsize}")
+        return lut[pixel_array.view(unsigned)]
+
+    # Fallback (float / 32-bit data): in-place float32 arithmetic
+    pixel_array = pixel_array.astype(np.float32)
+    if slope != 1.0:
+        pixel_array *= slope
+    if intercept != 0.0:
+        pixel_array += intercept
+    if window is None:
+        window = (float(pixel_array.min()), float(pixel_array.max()))
+    min_val, max_val = window
+    if max_val == min_val:
+        return np.zeros(pixel_array.shape, np.uint8)
+    np.clip(pixel_array, min_val, max_val, out=pixel_array)
+    pixel_array -= min_val
+    pixel_array *= 255.0 / (max_val - min_val)
+    return pixel_array.astype(np.uint8)
+
+def dicom_metadata(dcm):
+    """Metadata dict (PatientName, PatientID, etc.) of a pydicom dataset."""
+    # Series Laterality (0020,0060) as fallback; .get with a tag tuple returns the element
+    laterality = dcm.get("ImageLaterality", None)
+    if laterality is None:
+        element = dcm.get((0x0020, 0x0060), None)
+        laterality = element.value if element is not None else "N/A"
+    return {
+        "Patient Name": str(dcm.get("PatientName", "N/A")),
+        "Patient ID": str(dcm.get("PatientID", "N/A")),
+        "Study Date": str(dcm.get("StudyDate", "N/A")),
+        "Modality": str(dcm.get("Modality", "N/A")),
+        "Body Part": str(dcm.get("BodyPartExamined", "N/A")),
+        "Laterality": str(laterality)
+    }
+
+# Tags read by read_dicom_header (pixel data is never touched)
+HEADER_TAGS = ["PatientName", "PatientID", "StudyDate", "Modality", "BodyPartExamined",
+               "ImageLaterality", (0x0020, 0x0060)]
+
+def read_dicom_header(dicom_path):
+    """
+    Reads only the header tags needed for the batch table (stops before pixel data).
+    Returns the same metadata dict as load_dicom_array, or None if unreadable.
+    """
+    try:
+        import pydicom
+        dcm = pydicom.dcmread(dicom_path, stop_before_pixels=True, specific_tags=HEADER_TAGS)
+        return dicom_metadata(dcm)
+    except Exception as e:
+        print(f"Error reading DICOM header: {e}")
+        return None
+
+MODEL_MIN_SIZE = 512 # Model input size: reduced decodes never go below it
+
+def reduction_factor(width, height, min_width=MODEL_MIN_SIZE, min_height=MODEL_MIN_SIZE):
+    """Largest of 8/4/2 that keeps the image at least min_width x min_height (1 if none does)."""
+    for factor in (8, 4, 2):
+        if width // factor >= min_width and height // factor >= min_height:
+            return factor
+    return 1
+
+def _reduced_metadata(metadata, full_shape):
+    # Geometry is mapped straight to this size (see PesPlanusAnalyzer.measure)
+    metadata["Original Size"] = (full_shape[1], full_shape[0])
+    return metadata
+
+def load_dicom_array(dicom_path, min_width=None):
     """
     Reads a DICOM file and returns (pixel_array, metadata).
     metadata is a dict containing PatientName, PatientID, etc.
+    min_width: inference mode; the frame is decimated (before windowing) while
+    it stays at least min_width wide, and metadata gets "Original Size".
     """
     try:
+        import pydicom # Deferred: not needed until the first DICOM is opened
         dcm = pydicom.dcmread(dicom_path)
-        pixel_array = dcm.pixel_array.astype(float)
+        pixel_array = dcm.pixel_array # Stored integers; converted by window_to_uint8
         
         # Extract Metadata
-        metadata = {
-            "Patient Name": str(dcm.get("PatientName", "N/A")),
-            "Patient ID": str(dcm.get("PatientID", "N/A")),
-            "Study Date": str(dcm.get("StudyDate", "N/A")),
-            "Modality": str(dcm.get("Modality", "N/A")),
-            "Body Part": str(dcm.get("BodyPartExamined", "N/A")),
-            "Laterality": str(dcm.get("ImageLaterality", dcm.get((0x0020, 0x0060), "N/A")))
-        }
+        metadata = dicom_metadata(dcm)
 
-        # Apply Rescale Slope/Intercept
+        # Rescale Slope/Intercept
         slope = getattr(dcm, 'RescaleSlope', 1)
         intercept = getattr(dcm, 'RescaleIntercept', 0)
-        pixel_array = pixel_array * slope + intercept
 
-        # Apply Windowing
-        # Apply Windowing
+        # Windowing
+        window = None
         if 'WindowCenter' in dcm and 'WindowWidth' in dcm:
-            wc = dcm.WindowCenter
-            ww = dcm.WindowWidth
-            # Handle MultiValue (list-like)
-            if hasattr(wc, '__iter__') and not isinstance(wc, (str, float, int)): wc = wc[0]
-            if hasattr(ww, '__iter__') and not isinstance(ww, (str, float, int)): ww = ww[0]
-            
-            min_val = float(wc) - (float(ww) / 2)
-            max_val = float(wc) + (float(ww) / 2)
-            pixel_array = np.clip(pixel_array, min_val, max_val)
-        else:
-            min_val = np.min(pixel_array)
-            max_val = np.max(pixel_array)
+            window = _window_range(dcm.WindowCenter, dcm.WindowWidth)
+
+        if min_width and pixel_array.ndim == 2:
+            factor = reduction_factor(pixel_array.shape[1], pixel_array.shape[0], min_width)
+            if factor > 1:
+                full_shape = pixel_array.shape
+                pixel_array = pixel_array[::factor, ::factor] # Strided view; the LUT pass makes it contiguous
+                _reduced_metadata(metadata, full_shape)
         
         # Normalize to 0-255 uint8
-        if max_val != min_val:
-            pixel_array = (pixel_array - min_val) / (max_val - min_val) * 255.0
-        else:
-            pixel_array = pixel_array * 0
-            
-        return np.uint8(pixel_array), metadata
+        return window_to_uint8(pixel_array, slope, intercept, window), metadata
         
     except Exception as e:
         print(f"Error loading DICOM: {e}")
         return None, None
 
-def load_image_array(image_path):
+def jpeg_size(data):
+    """(width, height) from a JPEG's SOF header, or None. data: bytes-like."""
+    data = memoryview(data).tobytes() if not isinstance(data, bytes) else data
+    if data[:2] != b"\xff\xd8":
+        return None
+    pos = 2
+    while pos + 9 < len(data):
+        if data[pos] != 0xFF:
+            pos += 1
+            continue
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1 # Fill byte
+            continue
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            pos += 2 # Markers without a length field
+            continue
+        length = (data[pos + 2] << 8) | data[pos + 3]
+        # SOF0-15, except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height = (data[pos + 5] << 8) | data[pos + 6]
+            width = (data[pos + 7] << 8) | data[pos + 8]
+            return width, height
+        pos += 2 + length
+    return None
+
+_REDUCED_FLAGS = {2: "IMREAD_REDUCED_GRAYSCALE_2", 4: "IMREAD_REDUCED_GRAYSCALE_4", 8: "IMREAD_REDUCED_GRAYSCALE_8"}
+
+def load_image_array(image_path, min_width=None):
     """
     Loads a standard image (JPG/PNG) as a numpy array (grayscale) + metadata.
     Uses cv2.imdecode + np.fromfile to handle Unicode paths on Windows.
+    min_width: inference mode; JPEGs are decoded at 1/2, 1/4 or 1/8 scale
+    (libjpeg DCT scaling) while they stay at least min_width wide, and
+    metadata gets "Original Size".
     """
     try:
         import cv2
@@ -66,7 +187,11 @@ def load_image_array(image_path):
         # OpenCV's standard imread doesn't assume utf-8 on Windows
         # Solution: Read binary -> Decode
         stream = np.fromfile(image_path, dtype=np.uint8)
-        img = cv2.imdecode(stream, cv2.IMREAD_GRAYSCALE)
+
+        full_size = jpeg_size(stream[:65536]) if min_width else None # SOF sits in the first few KB
+        factor = reduction_factor(*full_size, min_width) if full_size else 1
+        flag = getattr(cv2, _REDUCED_FLAGS[factor]) if factor > 1 else cv2.IMREAD_GRAYSCALE
+        img = cv2.imdecode(stream, flag)
         
         if img is None:
              raise ValueError("Görüntü okunamadı (Decode Error).")
@@ -76,7 +201,97 @@ def load_image_array(image_path):
             "Size": f"{img.shape[1]}x{img.shape[0]}",
             "Mode": "Grayscale"
         }
+        if factor > 1:
+            full_w, full_h = full_size
+            metadata["Size"] = f"{full_w}x{full_h}"
+            _reduced_metadata(metadata, (full_h, full_w))
         return img, metadata
     except Exception as e:
         print(f"Error loading Image: {e}")
         return None, None
+
+DICOM_EXTENSIONS = ('.dcm', '.dicom')
+
+def has_dicom_preamble(path):
+    """True if the file has the Part 10 'DICM' marker after the 128-byte preamble."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(132)
+        return len(head) == 132 and head[128:] == b"DICM"
+    except OSError:
+        return False
+
+def is_dicom_path(path):
+    """DICOM by extension; extension-less files (common in PACS exports) by their preamble."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in DICOM_EXTENSIONS:
+        return True
+    return ext == "" and has_dicom_preamble(path)
+
+def load_array(path, min_width=None):
+    """
+    Loads a DICOM or standard image with a single decode.
+    Returns (pixel_array, metadata) like the specific loaders.
+    min_width: reduced-resolution decode for inference (see
+    PesPlanusAnalyzer.decode_width); leave None for display.
+    """
+    if is_dicom_path(path):
+        return load_dicom_array(path, min_width)
+    return load_image_array(path, min_width)
+
+class DecodedImageCache:
+    """
+    Small LRU of decoded grayscale images, bounded by total bytes.
+    Keyed by (path, mtime) so an edited file is decoded again. Thread-safe.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        import threading
+        from collections import OrderedDict
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict() # key -> (pixel_array, metadata)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path):
+        try:
+            return path, os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def get(self, path):
+        """Returns (pixel_array, metadata) or None."""
+        key = self._key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, path, pixel_array, metadata):
+        key = self._key(path)
+        if key is None or pixel_array is None or pixel_array.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[0].nbytes
+            self._entries[key] = (pixel_array, metadata)
+            self._bytes += pixel_array.nbytes
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+# Images opened in the UI (review dialog), reused by report generation
+decoded_images = DecodedImageCache()
+
+def load_array_cached(path, cache=decoded_images):
+    """load_array() through the shared decoded-image cache."""
+    entry = cache.get(path)
+    if entry is not None:
+        return entry
+    pixel_array, metadata = load_array(path)
+    if pixel_array is not None:
+        cache.put(path, pixel_array, metadata)
+    return pixel_array, metadata
@@ -0,0 +1,296 @@
+import os
+import json
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from src.core.batch_item import BatchItem, IMAGE_EXTENSIONS
+from src.core.dicom_loader import DICOM_EXTENSIONS, has_dicom_preamble, read_dicom_header
+
+DEFAULT_MANIFEST_DIR = os.path.join(os.path.expanduser("~"), ".pes_planus", "scans")
+
+
+def is_candidate(filename):
+    """Image/DICOM extension, or no extension at all (checked for a DICOM preamble)."""
+    ext = os.path.splitext(filename)[1].lower()
+    return ext in IMAGE_EXTENSIONS or ext == ""
+
+
+def needs_probe(path):
+    """True for files whose item depends on reading the file (DICOM or no extension)."""
+    ext = os.path.splitext(path)[1].lower()
+    return ext in DICOM_EXTENSIONS or ext == ""
+
+
+def probe_file(path):
+    """
+    Reads what the batch table needs from a file without decoding pixels.
+    Returns (keep, metadata): keep is False for extension-less files that are
+    not DICOM; metadata is the DICOM header (None for images or unreadable headers).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == "" and not has_dicom_preamble(path):
+        return False, None
+    if ext in DICOM_EXTENSIONS or ext == "":
+        return True, read_dicom_header(path)
+    return True, None
+
+
+def make_item(path, probe=None):
+    """
+    BatchItem for a scanned file with its DICOM header applied (header only,
+    no pixel decode). Returns None for extension-less files that are not DICOM.
+    probe: a (keep, metadata) result of probe_file, e.g. from the scan manifest.
+    """
+    keep, metadata = probe if probe is not None else probe_file(path)
+    if not keep:
+        return None
+    item = BatchItem(path)
+    if metadata:
+        item.apply_dicom_header(metadata)
+    return item
+
+
+def default_scan_workers():
+    # Header reads and directory listings are I/O bound (network shares); more threads than cores pays off
+    return min(16, (os.cpu_count() or 2) * 2)
+
+
+def manifest_path(root, manifest_dir=DEFAULT_MANIFEST_DIR):
+    key = hashlib.sha1(os.path.normcase(os.path.abspath(root)).encode("utf-8")).hexdigest()
+    return os.path.join(manifest_dir, f"{key}.json")
+
+
+class FolderScanner:
+    """
+    Concurrent scandir walk of one root with a persisted manifest.
+
+    The manifest stores, per directory, its mtime, candidate files as
+    name -> (size, mtime_ns) and subdirectory names, plus the probe_file
+    result (DICOM header) of each file keyed by its (size, mtime_ns). On a
+    later scan a directory whose mtime is unchanged is only stat'ed and its
+    stored listing reused; changed or new directories are listed again.
+    Headers are only read again for added or modified files. Afterwards
+    added, removed and modified hold the differences to the previous scan.
+
+    A file rewritten in place keeps its directory mtime, so with the default
+    it is not noticed. verify_files=True also lists unchanged directories
+    again (one scandir pass each; on Windows the sizes/mtimes come with the
+    listing) to catch such rewrites, at the cost of the I/O the manifest saves.
+    """
+
+    def __init__(self, root, workers=None, manifest_dir=DEFAULT_MANIFEST_DIR, use_manifest=True, verify_files=False):
+        self.root = os.path.abspath(root)
+        self.workers = max(1, int(workers or default_scan_workers()))
+        self.manifest_file = manifest_path(self.root, manifest_dir) if use_manifest else None
+        self.verify_files = verify_files
+        self.has_previous = False # A manifest from an earlier scan existed
+        self.completed = False # iter_files ran to the end (the manifest may be saved)
+        self.added = []
+        self.removed = []
+        self.modified = []
+        self.dirs_listed = 0 # New or changed directories
+        self.dirs_reused = 0 # Unchanged directories, stored listing reused
+        self.dirs_verified = 0 # Unchanged directories listed again (verify_files)
+        self.files = {} # path -> (size, mtime_ns) of this scan
+        self._dirs = {}
+        self._old_probes = {} # path -> [size, mtime_ns, keep, metadata] from the manifest
+        self._probes = {}
+        self._probes_lock = threading.Lock() # Probes are stored from scan_items' consumer
+
+    def load_manifest(self):
+        if not self.manifest_file or not os.path.exists(self.manifest_file):
+            return {}
+        try:
+            with open(self.manifest_file, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("root") != self.root:
+                return {}
+            self.has_previous = True
+            self._old_probes = data.get("probes", {})
+            return data["dirs"]
+        except Exception as e:
+            print(f"Tarama özeti okunamadı: {e}")
+            return {}
+
+    def cached_probe(self, path):
+        """probe_file result from the previous scan if the file is unchanged, else None."""
+        key = self.files.get(path)
+        old = self._old_probes.get(path)
+        if key is None or old is None or tuple(old[:2]) != tuple(key):
+            return None
+        self.store_probe(path, (old[2], old[3]))
+        return old[2], old[3]
+
+    def store_probe(self, path, probe):
+        key = self.files.get(path)
+        if key is not None:
+            with self._probes_lock:
+                self._probes[path] = [key[0], key[1], probe[0], probe[1]]
+
+    def save_manifest(self):
+        """Writes the listing of a completed scan together with the probes stored so far."""
+        if not self.manifest_file or not self.completed:
+            return
+        with self._probes_lock:
+            probes = dict(self._probes)
+        try:
+            os.makedirs(os.path.dirname(self.manifest_file), exist_ok=True)
+            tmp = self.manifest_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"root": self.root, "dirs": self._dirs, "probes": probes}, f)
+            os.replace(tmp, self.manifest_file) # Never leave a half-written manifest
+        except Exception as e:
+            print(f"Tarama özeti kaydedilemedi: {e}")
+
+    @staticmethod
+    def _list(path):
+        """Candidate files (name -> [size, mtime_ns]) and subdirectory names of one directory."""
+        files = {}
+        dirs = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.name)
+                    elif entry.is_file() and is_candidate(entry.name):
+                        st = entry.stat()
+                        files[entry.name] = [st.st_size, st.st_mtime_ns]
+                except OSError:
+                    continue
+        return dict(sorted(files.items())), sorted(dirs)
+
+    def _visit(self, path, old):
+        """Returns (path, record, state) for one directory; state is "listed", "reused" or "verified"."""
+        mtime_ns = os.stat(path).st_mtime_ns
+        if old is not None and old["mtime_ns"] == mtime_ns:
+            if not self.verify_files:
+                return path, old, "reused"
+            # Same entries, but a file may have been rewritten in place: refresh size/mtime
+            files, _ = self._list(path)
+            return path, dict(old, files=files), "verified"
+
+        files, dirs = self._list(path)
+        return path, {"mtime_ns": mtime_ns, "files": files, "dirs": dirs}, "listed"
+
+    def iter_files(self, should_stop=None, save=True):
+        """
+        Yields candidate file paths as directories complete (listing runs in
+        parallel). The differences are filled in, and the manifest saved, only
+        when the scan ran to the end. save=False leaves saving to the caller
+        (scan_items saves once the headers of the yielded files are stored).
+        """
+        previous = self.load_manifest()
+        current = {}
+        stopped = False
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            pending = {pool.submit(self._visit, self.root, previous.get(self.root)): self.root}
+            while pending:
+                if should_stop and should_stop():
+                    stopped = True
+                    break
+                done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    failed_path = pending.pop(future)
+                    try:
+                        path, record, state = future.result()
+                    except OSError as e:
+                        print(f"Klasör okunamadı: {e}")
+                        # Unreachable for now (e.g. share hiccup): keep its last listing, not "removed"
+                        if failed_path in previous:
+                            current[failed_path] = previous[failed_path]
+                        continue
+                    current[path] = record
+                    if state == "listed":
+                        self.dirs_listed += 1
+                    elif state == "verified":
+                        self.dirs_verified += 1
+                    else:
+                        self.dirs_reused += 1
+                    for name in record["dirs"]:
+                        sub = os.path.join(path, name)
+                        pending[pool.submit(self._visit, sub, previous.get(sub))] = sub
+                    for name, key in record["files"].items():
+                        file_path = os.path.join(path, name)
+                        self.files[file_path] = tuple(key)
+                        yield file_path
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        if stopped:
+            return
+        old_files = self._flatten(previous)
+        new_files = self._flatten(current)
+        self.added = sorted(p for p in new_files if p not in old_files)
+        self.removed = sorted(p for p in old_files if p not in new_files)
+        self.modified = sorted(p for p, key in new_files.items() if p in old_files and old_files[p] != key)
+        self._dirs = current
+        self.completed = True
+        if save:
+            self.save_manifest()
+
+    @staticmethod
+    def _flatten(dirs):
+        return {
+            os.path.join(path, name): tuple(key)
+            for path, record in dirs.items()
+            for name, key in record["files"].items()
+        }
+
+    def summary(self):
+        if not self.has_previous:
+            return f"İlk tarama ({self.dirs_listed} klasör listelendi)"
+        if self.verify_files:
+            unchanged = f"{self.dirs_verified} değişmemiş klasör yeniden denetlendi"
+        else:
+            # In-place rewrites there are not in "Değişen"
+            unchanged = f"{self.dirs_reused} değişmemiş klasör atlandı"
+        return (f"Yeni: {len(self.added)}, Silinen: {len(self.removed)}, Değişen: {len(self.modified)} "
+                f"({self.dirs_listed} klasör listelendi, {unchanged})")
+
+
+def _probe_and_store(scanner, path):
+    probe = probe_file(path)
+    scanner.store_probe(path, probe)
+    return make_item(path, probe)
+
+
+def scan_items(folder, should_stop=None, workers=None, scanner=None):
+    """
+    Scans folder (see FolderScanner) and yields BatchItems as files are found.
+    Header reads run in a thread pool with a bounded number in flight; files
+    unchanged since the previous scan reuse the header stored in its manifest.
+    Pass a FolderScanner to read its added/removed/modified lists afterwards.
+    """
+    workers = max(1, int(workers or default_scan_workers()))
+    scanner = scanner or FolderScanner(folder, workers=workers)
+    pending = deque()
+    stopped = False
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for path in scanner.iter_files(should_stop, save=False):
+            probe = scanner.cached_probe(path) if needs_probe(path) else (True, None)
+            if probe is not None:
+                future = Future() # Already known: keep its place in the output order
+                future.set_result(make_item(path, probe))
+            else:
+                future = pool.submit(_probe_and_store, scanner, path)
+            pending.append(future)
+            # Hand out finished items in order; block only when too many are in flight
+            while pending and (pending[0].done() or len(pending) > workers * 4):
+                item = pending.popleft().result()
+                if item is not None:
+                    yield item
+
+        while pending:
+            if should_stop and should_stop():
+                for future in pending:
+                    future.cancel()
+                stopped = True
+                break
+            item = pending.popleft().result()
+            if item is not None:
+                yield item
+    if not stopped:
+        scanner.save_manifest() # Listing and headers of this scan, for the next one
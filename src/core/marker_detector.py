@@ -1,138 +1,400 @@
+import os
+import json
+import threading
+from collections import Counter
 import cv2
 import numpy as np
-import easyocr
-import torch
+
+STATS_PATH = os.path.join(os.path.expanduser("~"), ".pes_planus", "marker_stats.json")
+ROI_PAD = 20 # Black border added around each corner ROI (see prepare_rois)
+
+LEFT_TOKENS = ["L", "LT", "LEFT", "SOL", "L."]
+RIGHT_TOKENS = ["R", "RT", "RIGHT", "SAG", "SAĞ", "R."]
+
+# OCR preprocessing variants in their default (pre-statistics) order
+VARIANT_ORDER = [
+    "Original", "Inverted", "ThreshOtsu", "ThreshOtsuInv",
+    "Fixed180", "Fixed180Inv", "Adaptive", "Upscaled", "UpscaledInv",
+]
+
+
+def _build_variant(name, roi):
+    """Creates a single OCR preprocessing variant of the ROI (on demand)."""
+    if name == "Original":
+        return roi
+    if name == "Inverted":
+        # White text on Black background becomes Black on White
+        # This is CRITICAL for X-rays where markers are often white.
+        return cv2.bitwise_not(roi)
+    if name in ("ThreshOtsu", "ThreshOtsuInv"):
+        roi_blur = cv2.GaussianBlur(roi, (3,3), 0)
+        _, roi_thresh = cv2.threshold(roi_blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return roi_thresh if name == "ThreshOtsu" else cv2.bitwise_not(roi_thresh)
+    if name in ("Fixed180", "Fixed180Inv"):
+        # Good for high contrast markers
+        _, roi_fixed = cv2.threshold(roi, 180, 255, cv2.THRESH_BINARY)
+        return roi_fixed if name == "Fixed180" else cv2.bitwise_not(roi_fixed)
+    if name == "Adaptive":
+        # Good for varying lighting
+        return cv2.adaptiveThreshold(roi, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+    if name in ("Upscaled", "UpscaledInv"):
+        # For small markers
+        h_r, w_r = roi.shape
+        roi_up = cv2.resize(roi, (w_r*2, h_r*2), interpolation=cv2.INTER_LINEAR)
+        return roi_up if name == "Upscaled" else cv2.bitwise_not(roi_up)
+    raise ValueError(name)
+
+
+def _side_from_text(text):
+    text_upper = text.upper().strip()
+    if text_upper in LEFT_TOKENS:
+        return "L"
+    if text_upper in RIGHT_TOKENS:
+        return "R"
+    return None
+
 
 class MarkerDetector:
     _reader = None
+    WORK_WIDTH = 1200 # Larger images are downscaled to this width before the corner ROIs are cut
+    _reader_lock = threading.Lock() # Batch post-processing threads share one reader
+
+    # Tier 1 (glyph matching) acceptance thresholds
+    GLYPH_SIZE = 32
+    GLYPH_MIN_SCORE = 0.80
+    GLYPH_MIN_MARGIN = 0.10
+    _glyph_templates = None
+
+    # Hit statistics: which tier / OCR variant produced the answer
+    tier_hits = Counter()
+    variant_hits = Counter()
+    _stats_lock = threading.Lock()
+    _stats_loaded = False
 
     @classmethod
     def get_reader(cls):
         """Lazy load EasyOCR reader to save resources if not used."""
-        if cls._reader is None:
-            # Check for CUDA
-            use_gpu = torch.cuda.is_available()
-            print(f"Initializing EasyOCR (GPU={use_gpu})...")
-            # Only English is usually enough for L/R, but maybe Turkish for "SOL/SAG"
-            cls._reader = easyocr.Reader(['en'], gpu=use_gpu, verbose=False) 
+        with cls._reader_lock:
+            if cls._reader is None:
+                # Heavy imports deferred until OCR is actually needed
+                import easyocr
+                import torch
+                # Check for CUDA
+                use_gpu = torch.cuda.is_available()
+                print(f"Initializing EasyOCR (GPU={use_gpu})...")
+                # Only English is usually enough for L/R, but maybe Turkish for "SOL/SAG"
+                cls._reader = easyocr.Reader(['en'], gpu=use_gpu, verbose=False)
         return cls._reader
 
+    # --- Statistics ---
+
+    @classmethod
+    def load_stats(cls, path=STATS_PATH):
+        with cls._stats_lock:
+            cls._stats_loaded = True
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                cls.tier_hits.update(data.get("tiers", {}))
+                cls.variant_hits.update(data.get("variants", {}))
+            except (OSError, ValueError):
+                pass
+
+    @classmethod
+    def save_stats(cls, path=STATS_PATH):
+        with cls._stats_lock:
+            data = {"tiers": dict(cls.tier_hits), "variants": dict(cls.variant_hits)}
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            print(f"Marker istatistikleri kaydedilemedi: {e}")
+
+    @classmethod
+    def stats_snapshot(cls):
+        """Copies of (tier_hits, variant_hits); diff two snapshots to get the hits in between."""
+        with cls._stats_lock:
+            return Counter(cls.tier_hits), Counter(cls.variant_hits)
+
+    @classmethod
+    def merge_stats(cls, tiers, variants):
+        """Adds hits counted elsewhere (e.g. in a worker process) to this process's statistics."""
+        if not cls._stats_loaded:
+            cls.load_stats() # Otherwise save_stats() would overwrite the stored history
+        with cls._stats_lock:
+            cls.tier_hits.update(tiers)
+            cls.variant_hits.update(variants)
+
+    @classmethod
+    def _record(cls, tier, variant=None):
+        with cls._stats_lock:
+            cls.tier_hits[tier] += 1
+            if variant:
+                cls.variant_hits[variant] += 1
+
+    @classmethod
+    def variant_order(cls):
+        """OCR variants sorted by past hits (most productive first)."""
+        if not cls._stats_loaded:
+            cls.load_stats()
+        with cls._stats_lock:
+            hits = dict(cls.variant_hits)
+        return sorted(VARIANT_ORDER, key=lambda name: -hits.get(name, 0))
+
+    # --- ROI preparation ---
+
+    @staticmethod
+    def prepare_rois(image_array: np.ndarray):
+        """Returns the two padded top-corner ROIs (left, right) searched for markers."""
+        # Ensure Grayscale
+        if len(image_array.shape) == 3:
+            gray = cv2.cvtColor(image_array, cv2.COLOR_BGR2GRAY)
+        else:
+            gray = image_array
+
+        h, w = gray.shape
+
+        # Resize for speed if too large (Safe limit)
+        if w > MarkerDetector.WORK_WIDTH:
+            scale = MarkerDetector.WORK_WIDTH / w
+            new_w, new_h = MarkerDetector.WORK_WIDTH, int(h * scale)
+            gray = cv2.resize(gray, (new_w, new_h), interpolation=cv2.INTER_AREA)
+            h, w = new_h, new_w
+
+        # Define ROI: Top 40% height
+        roi_h = int(h * 0.40)
+
+        # Split into two overlapping halves to cover center
+        # Left: 0% to 60% width / Right: 40% to 100% width
+        roi_tl = gray[0:roi_h, 0:int(w * 0.60)]
+        roi_tr = gray[0:roi_h, int(w * 0.40):w]
+
+        # Add 20px border to help OCR with edge characters
+        def pad_roi(roi):
+            return cv2.copyMakeBorder(roi, ROI_PAD, ROI_PAD, ROI_PAD, ROI_PAD, cv2.BORDER_CONSTANT, value=[0])
+
+        return pad_roi(roi_tl), pad_roi(roi_tr)
+
+    # --- Tier 1: Glyph matching ---
+
+    @classmethod
+    def get_glyph_templates(cls):
+        """Binary 'L'/'R' templates rendered with several fonts and stroke widths."""
+        if cls._glyph_templates is None:
+            size = cls.GLYPH_SIZE
+            templates = {"L": [], "R": []}
+            for letter in templates:
+                for font in (cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX, cv2.FONT_HERSHEY_TRIPLEX):
+                    for thickness in (3, 6, 9):
+                        canvas = np.zeros((160, 160), np.uint8)
+                        cv2.putText(canvas, letter, (20, 130), font, 4, 255, thickness)
+                        x, y, w, h = cv2.boundingRect(canvas)
+                        glyph = cv2.resize(canvas[y:y+h, x:x+w], (size, size), interpolation=cv2.INTER_AREA)
+                        templates[letter].append(glyph.astype(np.float32))
+            cls._glyph_templates = templates
+        return cls._glyph_templates
+
     @staticmethod
-    def detect_side(image_array: np.ndarray) -> str:
+    def _has_neighbour(stats, idx):
+        """
+        True if another component of similar height sits on the same line
+        within about one glyph width of component idx (i.e. it is a letter
+        inside a word such as "HOSPITAL", not a standalone marker).
+        """
+        x, y, w, h = stats[idx, :4]
+        xs, ys, ws, hs = stats[:, 0], stats[:, 1], stats[:, 2], stats[:, 3]
+        similar = (hs >= 0.5 * h) & (hs <= 2.0 * h)
+        overlap = np.minimum(ys + hs, y + h) - np.maximum(ys, y) # Shared rows
+        same_line = overlap >= 0.5 * np.minimum(hs, h)
+        gap = np.maximum(xs - (x + w), x - (xs + ws)) # Horizontal distance (<0: overlapping)
+        near = gap <= max(w, 0.6 * h)
+        near[[0, idx]] = False # Background label and the component itself
+        return bool(np.any(similar & same_line & near))
+
+    @classmethod
+    def match_glyphs(cls, roi: np.ndarray):
+        """
+        Cheap L/R detection: threshold the corner crop, take isolated
+        letter-shaped connected components and correlate them with rendered
+        glyphs. Letters with a neighbour on the same line (words) are left to
+        the OCR sweep. Returns (side, score) or (None, best_score).
+        """
+        templates = cls.get_glyph_templates()
+        size = cls.GLYPH_SIZE
+        roi_h = roi.shape[0]
+        best = {"L": 0.0, "R": 0.0}
+
+        # Threshold from the image content only: the black padding would pull
+        # Otsu between border and background and lose white markers
+        inner = roi[ROI_PAD:-ROI_PAD, ROI_PAD:-ROI_PAD] if min(roi.shape) > 2 * ROI_PAD else roi
+        level, _ = cv2.threshold(inner, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        _, bright = cv2.threshold(roi, level, 255, cv2.THRESH_BINARY)
+        for binary in (bright, cv2.bitwise_not(bright)): # White and dark markers
+            n, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+            for idx in range(1, n):
+                x, y, w, h, area = stats[idx]
+                # Letter-like blobs only: plausible height, aspect and ink coverage
+                if not (0.03 * roi_h <= h <= 0.35 * roi_h):
+                    continue
+                if not (0.3 <= w / h <= 1.1):
+                    continue
+                if not (0.12 <= area / float(w * h) <= 0.7):
+                    continue
+                if cls._has_neighbour(stats, idx):
+                    continue
+                patch = cv2.resize(binary[y:y+h, x:x+w], (size, size), interpolation=cv2.INTER_AREA).astype(np.float32)
+                for letter, glyphs in templates.items():
+                    for glyph in glyphs:
+                        score = float(cv2.matchTemplate(patch, glyph, cv2.TM_CCOEFF_NORMED)[0, 0])
+                        if score > best[letter]:
+                            best[letter] = score
+
+        side = max(best, key=best.get)
+        other = "R" if side == "L" else "L"
+        if best[side] >= cls.GLYPH_MIN_SCORE and best[side] - best[other] >= cls.GLYPH_MIN_MARGIN:
+            return side, best[side]
+        return None, best[side]
+
+    # --- Tier 2: EasyOCR variant sweep ---
+
+    @classmethod
+    def ocr_roi(cls, roi: np.ndarray, should_cancel=None):
+        """Runs OCR over preprocessing variants (best-performing first). Returns (side, variant)."""
+        reader = cls.get_reader()
+        for name in cls.variant_order():
+            if should_cancel and should_cancel():
+                return None, None
+            try:
+                img_variant = _build_variant(name, roi)
+            except Exception:
+                continue
+            results = reader.readtext(img_variant)
+            for (bbox, text, prob) in results:
+                if prob < 0.3: continue # Allow slightly lower confidence
+                side = _side_from_text(text)
+                if side:
+                    return side, name
+        return None, None
+
+    @staticmethod
+    def _pad_to(img, height, width):
+        # Replicate the (already padded) border so inverted variants stay white-edged
+        return cv2.copyMakeBorder(img, 0, height - img.shape[0], 0, width - img.shape[1], cv2.BORDER_REPLICATE)
+
+    @classmethod
+    def ocr_batched(cls, images, batch_size=16):
+        """
+        Runs EasyOCR once over a list of grayscale images (detection and
+        recognition batched). Images are padded to a common size first.
+        Returns one list of (bbox, text, prob) per image.
+        """
+        if not images:
+            return []
+        reader = cls.get_reader()
+        height = max(img.shape[0] for img in images)
+        width = max(img.shape[1] for img in images)
+        padded = [cls._pad_to(img, height, width) for img in images]
+        return reader.readtext_batched(padded, batch_size=batch_size)
+
+    @classmethod
+    def detect_sides(cls, images, batch_size=16):
+        """
+        Batched detect_side() for many images: returns one 'L'/'R'/None per image.
+        Glyph matching runs per image; the OCR sweep then runs one batched
+        readtext call per variant over every ROI still open, so OCR cost
+        grows with the number of variants tried rather than the image count.
+        The answer follows detect_side()'s priority: the left ROI in any
+        variant beats the right ROI, then the earliest variant wins.
+        """
+        sides = [None] * len(images)
+        pending = {} # image index -> (roi_tl, roi_tr)
+        right_found = {} # image index -> (side, variant) of the right ROI's first match
+        for idx, image in enumerate(images):
+            try:
+                rois = cls.prepare_rois(image)
+            except Exception as e:
+                print(f"OCR Error: {e}")
+                continue
+            for roi in rois:
+                side, _ = cls.match_glyphs(roi)
+                if side:
+                    cls._record("glyph")
+                    sides[idx] = side
+                    break
+            else:
+                pending[idx] = rois
+
+        for name in cls.variant_order():
+            if not pending:
+                break
+            jobs = [] # (image index, ROI number, variant image)
+            for idx, rois in pending.items():
+                for number, roi in enumerate(rois):
+                    if number > 0 and idx in right_found:
+                        continue # The right ROI already has its earliest match
+                    try:
+                        jobs.append((idx, number, _build_variant(name, roi)))
+                    except Exception:
+                        pass
+            try:
+                results = cls.ocr_batched([img for _, _, img in jobs], batch_size=batch_size)
+            except Exception as e:
+                print(f"OCR Error: {e}")
+                break
+            for (idx, number, _), found in zip(jobs, results):
+                if idx not in pending:
+                    continue
+                for (bbox, text, prob) in found:
+                    if prob < 0.3: continue
+                    side = _side_from_text(text)
+                    if side:
+                        if number == 0:
+                            # Left ROI: nothing can outrank it any more
+                            cls._record("ocr", name)
+                            sides[idx] = side
+                            del pending[idx]
+                        else:
+                            right_found[idx] = (side, name)
+                        break
+
+        for idx in pending:
+            if idx in right_found:
+                # Left ROI never matched: the right ROI's earliest match stands
+                side, name = right_found[idx]
+                cls._record("ocr", name)
+                sides[idx] = side
+            else:
+                cls._record("none")
+        return sides
+
+    @classmethod
+    def detect_side(cls, image_array: np.ndarray, should_cancel=None) -> str:
         """
         Detects 'L' or 'R' markers in the top corners of the image.
         Returns 'L', 'R', or None.
-        Attempts multiple preprocessing techniques for robustness.
+        Tier 1 matches glyph shapes (milliseconds); the EasyOCR variant sweep
+        only runs when that is not confident. should_cancel is polled between variants.
         """
         try:
-            reader = MarkerDetector.get_reader()
-            
-            # Ensure Grayscale
-            if len(image_array.shape) == 3:
-                gray = cv2.cvtColor(image_array, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = image_array
-            
-            h, w = gray.shape
-
-            # Resize for speed if too large (Safe limit)
-            if w > 1200:
-                scale = 1200 / w
-                new_w, new_h = 1200, int(h * scale)
-                gray = cv2.resize(gray, (new_w, new_h), interpolation=cv2.INTER_AREA)
-                h, w = new_h, new_w
-            
-            # Define ROI: Top 40% height
-            roi_h = int(h * 0.40)
-            
-            # Split into two overlapping halves to cover center
-            # Left: 0% to 60% width
-            w_60 = int(w * 0.60)
-            roi_tl = gray[0:roi_h, 0:w_60] 
-            
-            # Right: 40% to 100% width
-            w_40 = int(w * 0.40)
-            roi_tr = gray[0:roi_h, w_40:w]
-            
-            # Helper: Add padding
-            def pad_roi(roi):
-                # Add 20px border to help OCR with edge characters
-                return cv2.copyMakeBorder(roi, 20, 20, 20, 20, cv2.BORDER_CONSTANT, value=[0])
-
-            roi_tl = pad_roi(roi_tl)
-            roi_tr = pad_roi(roi_tr)
-            
-            # Helper to check text with multiple preprocessings
-            def check_roi_robust(roi):
-                # Preprocessing variants to try
-                variants = []
-                
-                # 1. Original (Gray)
-                variants.append(("Original", roi))
-                
-                # 2. Inverted (White text on Black background becomes Black on White)
-                # This is CRITICAL for X-rays where markers are often white.
-                roi_inv = cv2.bitwise_not(roi)
-                variants.append(("Inverted", roi_inv))
-                
-                # 3. Thresholded (Otsu)
-                try:
-                    roi_blur = cv2.GaussianBlur(roi, (3,3), 0)
-                    _, roi_thresh = cv2.threshold(roi_blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-                    variants.append(("ThreshOtsu", roi_thresh))
-                    variants.append(("ThreshOtsuInv", cv2.bitwise_not(roi_thresh)))
-                except: pass
-
-                # 4. Fixed Threshold (Good for high contrast markers)
-                try:
-                    _, roi_fixed = cv2.threshold(roi, 180, 255, cv2.THRESH_BINARY)
-                    variants.append(("Fixed180", roi_fixed))
-                    variants.append(("Fixed180Inv", cv2.bitwise_not(roi_fixed)))
-                except: pass
-                
-                # 5. Adaptive Threshold (Good for varying lighting)
-                try:
-                    roi_adapt = cv2.adaptiveThreshold(roi, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-                    variants.append(("Adaptive", roi_adapt))
-                except: pass
-
-                # 6. Upscaled (For small markers)
-                try:
-                    h_r, w_r = roi.shape
-                    roi_up = cv2.resize(roi, (w_r*2, h_r*2), interpolation=cv2.INTER_LINEAR)
-                    variants.append(("Upscaled", roi_up))
-                    variants.append(("UpscaledInv", cv2.bitwise_not(roi_up)))
-                except: pass
-
-                # Run OCR on each variant
-                for name, img_variant in variants:
-                    # Allow slightly lower confidence
-                    results = reader.readtext(img_variant)
-                    for (bbox, text, prob) in results:
-                        if prob < 0.3: continue # Lowered from 0.4
-                        
-                        text_upper = text.upper().strip()
-                        
-                        # Direct Matches
-                        if text_upper in ["L", "LT", "LEFT", "SOL", "L."]:
-                            # print(f"Detected 'L' in {name} with prob {prob}")
-                            return "L"
-                        if text_upper in ["R", "RT", "RIGHT", "SAG", "SAĞ", "R."]:
-                            # print(f"Detected 'R' in {name} with prob {prob}")
-                            return "R"
-                
-                return None
-            
-            # Check Left Overlap Region
-            side = check_roi_robust(roi_tl)
-            if side: return side
-            
-            # Check Right Overlap Region
-            side = check_roi_robust(roi_tr)
-            if side: return side
-            
+            rois = cls.prepare_rois(image_array)
+
+            for roi in rois:
+                side, _ = cls.match_glyphs(roi)
+                if side:
+                    cls._record("glyph")
+                    return side
+
+            # Check Left, then Right Overlap Region
+            for roi in rois:
+                side, variant = cls.ocr_roi(roi, should_cancel)
+                if side:
+                    cls._record("ocr", variant)
+                    return side
+
+            cls._record("none")
             return None
-            
+
         except Exception as e:
             print(f"OCR Error: {e}")
             return None
@@ -0,0 +1,173 @@
+import os
+import queue
+import threading
+
+_DONE = object() # Stage sentinel
+
+
+class AnalysisPipeline:
+    """
+    Staged producer/consumer runner for batch analysis:
+
+        decode pool -> [decoded queue] -> inference (single thread, batched)
+                    -> [mask queue] -> post-process pool (geometry + batched OCR)
+
+    Queues are bounded, so decoding never runs more than a few batches ahead
+    of the model and memory stays flat on large folders. Results are handed
+    back to the calling thread through on_result(index, path, result).
+    """
+
+    def __init__(self, analyzer, batch_size=8, decode_workers=2, post_workers=2, queue_batches=2):
+        self.analyzer = analyzer
+        self.batch_size = max(1, int(batch_size))
+        self.decode_workers = max(1, int(decode_workers))
+        self.post_workers = max(1, int(post_workers))
+        self.queue_size = self.batch_size * max(1, int(queue_batches))
+        self._stop = threading.Event()
+
+    @staticmethod
+    def default_workers():
+        """Splits available cores between decode and post-process pools."""
+        cpus = os.cpu_count() or 2
+        return max(1, cpus // 4), max(1, cpus // 4)
+
+    def stop(self):
+        self._stop.set()
+
+    def _put(self, q, entry):
+        # Blocking put that still reacts to stop requests (backpressure point)
+        while not self._stop.is_set():
+            try:
+                q.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q, timeout=0.1):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=timeout)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def run(self, paths, on_result, should_stop=None, side_hints=None, side_policy=None):
+        """
+        Processes all paths; blocks until finished or stopped.
+        should_stop: optional callable polled on the caller thread.
+        side_hints: optional early side guesses aligned with paths.
+        """
+        total = len(paths)
+        side_hints = side_hints or [None] * total
+        if total == 0:
+            return
+
+        self._stop.clear()
+        tasks = queue.Queue()
+        for entry in enumerate(paths):
+            tasks.put(entry)
+
+        decoded_q = queue.Queue(maxsize=self.queue_size)
+        mask_q = queue.Queue(maxsize=max(1, self.queue_size // self.batch_size)) # Whole batches
+        result_q = queue.Queue()
+
+        decoders_left = [self.decode_workers]
+        decoders_lock = threading.Lock()
+
+        def decode_loop():
+            while not self._stop.is_set():
+                try:
+                    idx, path = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                # Results are never rendered here: decode only as large as the model/OCR need
+                min_width = self.analyzer.decode_width(side_hints[idx], side_policy)
+                image, metadata, error = self.analyzer.load_input(path, min_width=min_width)
+                if error:
+                    result_q.put((idx, path, {"error": error}))
+                    continue
+                if not self._put(decoded_q, (idx, path, image, metadata)):
+                    break
+            with decoders_lock:
+                decoders_left[0] -= 1
+                last = decoders_left[0] == 0
+            if last:
+                self._put(decoded_q, _DONE)
+
+        def infer_loop():
+            finished = False
+            while not finished and not self._stop.is_set():
+                entry = self._get(decoded_q)
+                if entry is _DONE:
+                    break
+                batch = [entry]
+                # Top up the batch while decoders keep pace
+                while len(batch) < self.batch_size:
+                    try:
+                        entry = decoded_q.get(timeout=0.05)
+                    except queue.Empty:
+                        break
+                    if entry is _DONE:
+                        finished = True
+                        break
+                    batch.append(entry)
+
+                if self.analyzer.model is None:
+                    for idx, path, _, _ in batch:
+                        result_q.put((idx, path, {"error": "Model yüklü değil"}))
+                    continue
+                # A failing stacked pass is retried per image; only the bad inputs fail
+                predicted = self.analyzer.predict_masks_each([e[2] for e in batch])
+                for (idx, path, _, _), mask in zip(batch, predicted):
+                    if mask is None:
+                        result_q.put((idx, path, {"error": "Model tahmini başarısız"}))
+                masks = [mask for mask in predicted if mask is not None]
+                batch = [e for e, mask in zip(batch, predicted) if mask is not None]
+                if not batch:
+                    continue
+                # Post-processing keeps the batch together so OCR can run batched
+                if not self._put(mask_q, (batch, masks)):
+                    return
+            for _ in range(self.post_workers):
+                self._put(mask_q, _DONE)
+
+        def post_loop():
+            while True:
+                entry = self._get(mask_q)
+                if entry is _DONE:
+                    break
+                batch, masks = entry
+                try:
+                    results = self.analyzer.postprocess_many(
+                        [e[2] for e in batch], masks, [e[3] for e in batch],
+                        [side_hints[e[0]] for e in batch], side_policy,
+                    )
+                except Exception as e:
+                    results = [{"error": str(e)} for _ in batch]
+                for (idx, path, _, _), result in zip(batch, results):
+                    result_q.put((idx, path, result))
+
+        threads = [threading.Thread(target=decode_loop, daemon=True) for _ in range(self.decode_workers)]
+        threads.append(threading.Thread(target=infer_loop, daemon=True))
+        threads += [threading.Thread(target=post_loop, daemon=True) for _ in range(self.post_workers)]
+        for t in threads:
+            t.start()
+
+        received = 0
+        try:
+            while received < total:
+                if should_stop and should_stop():
+                    break
+                try:
+                    idx, path, result = result_q.get(timeout=0.1)
+                except queue.Empty:
+                    if not any(t.is_alive() for t in threads) and result_q.empty():
+                        break # Stages exited early (stopped)
+                    continue
+                received += 1
+                on_result(idx, path, result)
+        finally:
+            self._stop.set()
+            for t in threads:
+                t.join()
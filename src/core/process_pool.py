@@ -0,0 +1,127 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from src.ai.analyzer import DEFAULT_MODEL_PATH
+from src.core.timing import StageTimer
+from src.core.marker_detector import MarkerDetector
+
+# One analyzer per worker process, created by the pool initializer
+_worker_analyzer = None
+
+
+def _init_worker(model_path, torch_threads):
+    global _worker_analyzer
+    import cv2
+    import torch
+    # Each process gets a slice of the cores; avoids N x N thread oversubscription
+    torch.set_num_threads(torch_threads)
+    cv2.setNumThreads(1)
+    from src.ai.analyzer import PesPlanusAnalyzer
+    from src.core.marker_detector import MarkerDetector
+    _worker_analyzer = PesPlanusAnalyzer(model_path)
+    MarkerDetector.load_stats() # Variant ordering from past runs; loaded now so chunk deltas exclude it
+
+
+def _analyze_chunk(start, paths, batch_size, side_hints, side_policy):
+    from src.core.marker_detector import MarkerDetector
+    tiers_before, variants_before = MarkerDetector.stats_snapshot()
+    results = []
+    analyzed = _worker_analyzer.analyze_many(paths, batch_size=batch_size, side_hints=side_hints, side_policy=side_policy)
+    # analyze_many does not render overlays, so the IPC payload is numbers and points only
+    for offset, (path, result) in enumerate(analyzed):
+        results.append((start + offset, path, result))
+    timings = _worker_analyzer.timings.snapshot()
+    _worker_analyzer.timings.reset()
+    # Marker hits of this chunk only; the parent merges and saves them
+    tiers, variants = MarkerDetector.stats_snapshot()
+    marker_hits = (dict(tiers - tiers_before), dict(variants - variants_before))
+    return results, timings, marker_hits
+
+
+def terminate_workers(pool):
+    """
+    Kills the pool's worker processes and shuts it down. Used on stop: waiting
+    would block for a whole chunk's inference, and abandoned workers would keep
+    their cores (and model) busy alongside the next run's pool and hold up
+    interpreter exit.
+    """
+    if hasattr(pool, "terminate_workers"): # Python 3.14+
+        pool.terminate_workers()
+        return
+    processes = list((pool._processes or {}).values()) # shutdown() drops this mapping
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(timeout=5)
+
+
+class ProcessPoolRunner:
+    """
+    Runs batch analysis across worker processes, each holding its own model.
+    Same run(paths, on_result, should_stop) contract as AnalysisPipeline;
+    on_result is called on the calling thread as chunks complete. Stage
+    timings and MarkerDetector hit statistics from the workers are merged
+    into this process.
+    """
+
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, workers=None, batch_size=8):
+        self.model_path = model_path
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.batch_size = max(1, int(batch_size))
+        self.timings = StageTimer() # Aggregated from worker snapshots
+
+    def torch_threads(self):
+        return max(1, (os.cpu_count() or 1) // self.workers)
+
+    def run(self, paths, on_result, should_stop=None, side_hints=None, side_policy=None):
+        if not paths:
+            return
+        side_hints = side_hints or [None] * len(paths)
+
+        # 'spawn' keeps CUDA/OpenMP state out of forked children on every platform
+        ctx = multiprocessing.get_context("spawn")
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(self.model_path, self.torch_threads()),
+        )
+        stopped = False
+        try:
+            chunks = {}
+            for start in range(0, len(paths), self.batch_size):
+                chunk = paths[start:start + self.batch_size]
+                hints = side_hints[start:start + self.batch_size]
+                future = pool.submit(_analyze_chunk, start, chunk, self.batch_size, hints, side_policy)
+                chunks[future] = (start, chunk)
+            pending = set(chunks)
+
+            while pending:
+                if should_stop and should_stop():
+                    stopped = True
+                    break
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        results, timings, marker_hits = future.result()
+                    except Exception as e:
+                        print(f"Süreç hatası: {e}")
+                        start, chunk = chunks[future]
+                        for offset, path in enumerate(chunk):
+                            on_result(start + offset, path, {"error": str(e)})
+                        continue
+                    for name, (count, total) in timings.items():
+                        self.timings.add(name, total, count=count)
+                    MarkerDetector.merge_stats(*marker_hits)
+                    for idx, path, result in results:
+                        on_result(idx, path, result)
+        except KeyboardInterrupt:
+            stopped = True # Workers got the same SIGINT; don't wait on their chunks
+            raise
+        finally:
+            if stopped:
+                terminate_workers(pool) # Running chunks are dropped, not waited for
+            else:
+                pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,183 @@
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from src.core.batch_item import item_record
+from src.core.dicom_loader import load_array, decoded_images
+
+IMAGES_DIR = "Incelenen_Goruntuler"
+SUMMARY_NAME = "Ozet_Tablo.xlsx"
+
+
+def report_image_name(record):
+    safe_name = f"{record['patient_name']}_{record['patient_id']}_{record['side']}_{record['angle']:.1f}".replace(" ", "_")
+    return "".join([c for c in safe_name if c.isalnum() or c in ('_', '-')])
+
+
+def draw_report_overlay(img_arr, record):
+    """Report overlay (lines, angle, diagnosis, patient) on a BGR copy of a grayscale image."""
+    import cv2
+    vis_img = cv2.cvtColor(img_arr, cv2.COLOR_GRAY2BGR)
+    lines = record["lines"]
+    if len(lines) >= 2:
+        calc_pts = lines[0] # ((x1,y1), (x2,y2))
+        ground_pts = lines[1]
+
+        # Convert float/tuples to int points
+        c1 = (int(calc_pts[0][0]), int(calc_pts[0][1]))
+        c2 = (int(calc_pts[1][0]), int(calc_pts[1][1]))
+        g1 = (int(ground_pts[0][0]), int(ground_pts[0][1]))
+        g2 = (int(ground_pts[1][0]), int(ground_pts[1][1]))
+
+        # Draw Calcaneus (Magenta)
+        cv2.line(vis_img, c1, c2, (255, 0, 255), 3)
+        # Draw Ground (Cyan)
+        cv2.line(vis_img, g1, g2, (255, 255, 0), 2)
+
+        # Draw Text Box
+        angle_txt = f"{record['angle']:.1f} deg"
+        diag_txt = record["diagnosis"]
+
+        # Position text
+        txt_x = (c1[0] + c2[0]) // 2
+        txt_y = (c1[1] + c2[1]) // 2 - 40
+
+        # Draw background for text
+        (tw, th), _ = cv2.getTextSize(f"{angle_txt} | {diag_txt}", cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
+        cv2.rectangle(vis_img, (txt_x-10, txt_y-th-10), (txt_x+tw+10, txt_y+10), (0,0,0), -1)
+
+        cv2.putText(vis_img, f"{angle_txt}", (txt_x, txt_y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255,255,255), 2)
+
+        # Color for diagnosis
+        d_color = (0, 255, 0) # Green default
+        if "Pes Planus" in diag_txt: d_color = (0, 0, 255) # Red (BGR)
+        elif "Sınırda" in diag_txt: d_color = (0, 165, 255) # Orange
+
+        cv2.putText(vis_img, f"{diag_txt}", (txt_x, txt_y + 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, d_color, 2)
+
+        # Draw Patient Info Top Left
+        info_txt = f"{record['patient_name']} ({record['side']})"
+        cv2.putText(vis_img, info_txt, (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (200, 200, 200), 2)
+    return vis_img
+
+
+def render_report_image(record, image_cache=decoded_images):
+    """
+    Decodes (or reuses a cached decode of) one study, draws the overlay and
+    JPEG-encodes it. Returns the JPEG bytes, or None if the image cannot be read.
+    """
+    import cv2
+    cached = image_cache.get(record["path"]) if image_cache is not None else None
+    img_arr = cached[0] if cached is not None else load_array(record["path"])[0]
+    if img_arr is None:
+        return None
+    is_success, buffer = cv2.imencode(".jpg", draw_report_overlay(img_arr, record))
+    return buffer.tobytes() if is_success else None
+
+
+def summary_row(record, image_name):
+    return {
+        "Dosya": record["filename"],
+        "Hasta İsim": record["patient_name"],
+        "ID": record["patient_id"],
+        "Taraf": record["side"],
+        "Açı": record["angle"],
+        "Tanı": record["diagnosis"],
+        "Görsel": f"{IMAGES_DIR}/{image_name}.jpg"
+    }
+
+
+class ReportBuilder:
+    """
+    Writes the ZIP report (overlay JPEGs + summary Excel) straight into the
+    archive. Decode/draw/encode runs in a thread pool (OpenCV and NumPy release
+    the GIL); the calling thread only appends finished JPEGs, stored without
+    recompression. At most a few images per worker are in flight, so memory
+    stays flat on large batches.
+    """
+
+    def __init__(self, items, zip_path, workers=None, image_cache=decoded_images):
+        # Snapshot now: items may keep changing on the GUI thread while the report runs
+        self.records = [item_record(item) for item in items if item.status != "Hata" and item.lines]
+        self.zip_path = zip_path
+        self.workers = max(1, int(workers or min(8, os.cpu_count() or 1)))
+        self.image_cache = image_cache
+
+    def build(self, on_progress=None, should_cancel=None):
+        """
+        Returns the number of images written, or None if cancelled (the
+        partial archive is removed). on_progress(done, total) is called on
+        the calling thread.
+        """
+        total = len(self.records)
+        done = 0
+        rows = []
+        used_names = set()
+        cancelled = False
+
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            with zipfile.ZipFile(self.zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+                todo = iter(self.records)
+                in_flight = {}
+
+                def submit_next():
+                    record = next(todo, None)
+                    if record is not None:
+                        in_flight[pool.submit(render_report_image, record, self.image_cache)] = record
+
+                for _ in range(self.workers * 2):
+                    submit_next()
+
+                while in_flight:
+                    if should_cancel and should_cancel():
+                        cancelled = True
+                        break
+                    finished, _ = wait(in_flight, timeout=0.2, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        record = in_flight.pop(future)
+                        submit_next()
+                        done += 1
+                        try:
+                            data = future.result()
+                        except Exception as e:
+                            print(f"Error processing {record['filename']}: {e}")
+                            data = None
+                        if data is not None:
+                            name = report_image_name(record)
+                            # Same patient/side/angle twice: keep both images
+                            base, n = name, 1
+                            while name in used_names:
+                                n += 1
+                                name = f"{base}_{n}"
+                            used_names.add(name)
+                            # JPEG is already compressed; deflating it again only costs time
+                            info = zipfile.ZipInfo(f"{IMAGES_DIR}/{name}.jpg", time.localtime()[:6])
+                            zipf.writestr(info, data, compress_type=zipfile.ZIP_STORED)
+                            rows.append(summary_row(record, name))
+                        if on_progress:
+                            on_progress(done, total)
+
+                if not cancelled and rows:
+                    # Custom Sort: ID/Name Ascending, Side Descending (R first)
+                    rows.sort(key=lambda x: (
+                        x["Hasta İsim"],
+                        x["ID"],
+                        0 if x["Taraf"] in ["R", "Right", "Sag", "Sağ"] else 1
+                    ))
+                    import pandas as pd # Deferred: only needed for export
+                    excel = io.BytesIO()
+                    pd.DataFrame(rows).to_excel(excel, index=False)
+                    zipf.writestr(SUMMARY_NAME, excel.getvalue())
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        if cancelled:
+            try:
+                os.remove(self.zip_path)
+            except OSError:
+                pass
+            return None
+        return len(rows)
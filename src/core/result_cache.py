@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from src.ai.analyzer import DEFAULT_MODEL_PATH
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".pes_planus", "results.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    model_hash TEXT NOT NULL,
+    angle REAL,
+    diagnosis TEXT,
+    lines TEXT,
+    side TEXT,
+    ocr_side TEXT,
+    is_confirmed INTEGER NOT NULL DEFAULT 0,
+    updated REAL,
+    PRIMARY KEY (path, size, mtime_ns, model_hash)
+)
+"""
+
+
+def file_sha1(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _plain_number(v):
+    v = float(v)
+    return int(v) if v.is_integer() else v
+
+
+def lines_to_json(lines):
+    return json.dumps([[[_plain_number(c) for c in pt] for pt in line] for line in lines])
+
+
+def lines_from_json(text):
+    if not text:
+        return []
+    return [tuple(tuple(pt) for pt in line) for line in json.loads(text)]
+
+
+class ResultCache:
+    """
+    Persistent store of finished batch results (SQLite).
+    Rows are keyed by (path, size, mtime) plus the model weights hash, so a
+    changed file or a new model triggers re-analysis. Manually confirmed
+    results are returned regardless of the model hash.
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, model_path=DEFAULT_MODEL_PATH):
+        self.db_path = db_path
+        self.model_path = model_path
+        self._model_hash = None # Hashing the weights takes a moment; done on first lookup
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        # Shared between the GUI thread and BatchWorker; access is serialized by _lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    @property
+    def model_hash(self):
+        if self._model_hash is None:
+            self._model_hash = file_sha1(self.model_path) if os.path.exists(self.model_path) else "none"
+        return self._model_hash
+
+    @staticmethod
+    def _file_key(path):
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    def get(self, path):
+        """Returns the cached result dict for path, or None."""
+        try:
+            size, mtime_ns = self._file_key(path)
+        except OSError:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT angle, diagnosis, lines, side, ocr_side, is_confirmed FROM results "
+                "WHERE path=? AND size=? AND mtime_ns=? AND (model_hash=? OR is_confirmed=1) "
+                "ORDER BY is_confirmed DESC, updated DESC LIMIT 1",
+                (path, size, mtime_ns, self.model_hash),
+            ).fetchone()
+        if row is None:
+            return None
+        angle, diagnosis, lines, side, ocr_side, confirmed = row
+        return {
+            "angle": angle,
+            "diagnosis": diagnosis,
+            "lines": lines_from_json(lines),
+            "side": side,
+            "ocr_side": ocr_side,
+            "is_confirmed": bool(confirmed),
+        }
+
+    def apply(self, item):
+        """Fills a BatchItem from the cache. Returns True on a hit."""
+        cached = self.get(item.path)
+        if cached is None:
+            return False
+        item.status = "Tamamlandı"
+        item.angle = cached["angle"]
+        item.diagnosis = cached["diagnosis"]
+        item.lines = cached["lines"]
+        item.side = cached["side"] or item.side
+        item.ocr_side = cached["ocr_side"]
+        item.is_confirmed = cached["is_confirmed"]
+        return True
+
+    def put(self, item):
+        """Stores a finished BatchItem (no-op for items without a result)."""
+        if item.status != "Tamamlandı":
+            return
+        try:
+            size, mtime_ns = self._file_key(item.path)
+        except OSError:
+            return
+        with self._lock:
+            # One row per file version: drops rows from older models as well
+            self._conn.execute(
+                "DELETE FROM results WHERE path=? AND size=? AND mtime_ns=?",
+                (item.path, size, mtime_ns),
+            )
+            self._conn.execute(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    item.path, size, mtime_ns, self.model_hash,
+                    float(item.angle), item.diagnosis, lines_to_json(item.lines),
+                    item.side, item.ocr_side, int(item.is_confirmed), time.time(),
+                ),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,240 @@
+import os
+import csv
+import json
+import time
+import threading
+from abc import ABC, abstractmethod
+
+from src.core.batch_item import item_record, record_row, sort_rows
+
+SINK_FORMATS = (".jsonl", ".csv", ".parquet")
+DEFAULT_RUNS_DIR = os.path.join(os.path.expanduser("~"), ".pes_planus", "runs")
+
+# item_record keys, in file column order
+RECORD_FIELDS = [
+    "path", "filename", "patient_id", "patient_name", "side", "ocr_side",
+    "angle", "diagnosis", "status", "is_confirmed", "error", "lines",
+]
+
+
+class ResultSink(ABC):
+    """
+    Append-only result file, written one finished BatchItem at a time.
+    JSONL/CSV writes reach the disk right away, so a crash mid-run keeps
+    everything finished so far; Parquet keeps every completed part file
+    (see ParquetSink). An item written twice (re-analysis, manual
+    correction) keeps its last record on read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock() # item_finished may arrive from worker threads (CLI)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def write(self, item):
+        """Appends a finished item; items without a result are ignored."""
+        if item.status not in ("Tamamlandı", "Hata"):
+            return
+        record = item_record(item)
+        with self._lock:
+            self._write(record)
+            self.count += 1
+
+    @abstractmethod
+    def _write(self, record):
+        """Appends one item_record dict (called under the sink lock)."""
+
+    def close(self):
+        pass
+
+
+def _drop_partial_line(path):
+    """
+    Cuts a line left unfinished by a crash off the end of a text sink, so the
+    next append starts on a fresh line instead of being glued to it.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            step = min(4096, pos)
+            f.seek(pos - step)
+            chunk = f.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                pos = pos - step + newline + 1
+                break
+            pos -= step
+        if pos != end:
+            f.truncate(pos)
+
+
+class JsonlSink(ResultSink):
+    def __init__(self, path):
+        super().__init__(path)
+        _drop_partial_line(path)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class CsvSink(ResultSink):
+    def __init__(self, path):
+        super().__init__(path)
+        _drop_partial_line(path)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        # utf-8-sig so Excel shows Turkish characters correctly
+        self._file = open(path, "a", newline="", encoding="utf-8-sig" if new_file else "utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=RECORD_FIELDS)
+        if new_file:
+            self._writer.writeheader()
+
+    def _write(self, record):
+        record = dict(record, lines=json.dumps(record["lines"]))
+        self._writer.writerow(record)
+        self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ParquetSink(ResultSink):
+    """
+    Parquet dataset directory (needs pyarrow). Records are buffered and every
+    rows_per_part items written as one complete part file (part-00000.parquet,
+    ...). A Parquet file is only readable once closed (the footer is written
+    last), so each part is closed right away; a crash loses at most the
+    buffered records. A rerun on the same path adds parts after the existing ones.
+    """
+
+    def __init__(self, path, rows_per_part=256):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet çıktısı için pyarrow kurulu olmalı")
+        super().__init__(path)
+        os.makedirs(path, exist_ok=True)
+        self._pa = pa
+        self._pq = pq
+        self.rows_per_part = max(1, int(rows_per_part))
+        self._next_part = len(_parquet_parts(path))
+        self._buffer = []
+        self._schema = pa.schema([
+            ("path", pa.string()), ("filename", pa.string()),
+            ("patient_id", pa.string()), ("patient_name", pa.string()),
+            ("side", pa.string()), ("ocr_side", pa.string()),
+            ("angle", pa.float64()), ("diagnosis", pa.string()),
+            ("status", pa.string()), ("is_confirmed", pa.bool_()),
+            ("error", pa.string()), ("lines", pa.string()),
+        ])
+
+    def _write(self, record):
+        self._buffer.append(dict(record, lines=json.dumps(record["lines"])))
+        if len(self._buffer) >= self.rows_per_part:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        part = os.path.join(self.path, f"part-{self._next_part:05d}.parquet")
+        tmp = part + ".tmp" # Readers never see a half-written part
+        self._pq.write_table(self._pa.Table.from_pylist(self._buffer, schema=self._schema), tmp)
+        os.replace(tmp, part)
+        self._next_part += 1
+        self._buffer = []
+
+    def close(self):
+        with self._lock:
+            self._flush()
+
+
+def _parquet_parts(path):
+    if not os.path.isdir(path):
+        return []
+    return sorted(os.path.join(path, name) for name in os.listdir(path)
+                  if name.startswith("part-") and name.endswith(".parquet"))
+
+
+def new_run_path(ext=".jsonl", runs_dir=DEFAULT_RUNS_DIR):
+    """Timestamped result file for a GUI session, e.g. ~/.pes_planus/runs/batch_20250101_120000.jsonl."""
+    return os.path.join(runs_dir, time.strftime("batch_%Y%m%d_%H%M%S") + ext)
+
+
+def open_sink(path, **kwargs):
+    """Opens the sink matching the file extension (.jsonl, .csv, .parquet)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".jsonl":
+        return JsonlSink(path)
+    if ext == ".csv":
+        return CsvSink(path)
+    if ext == ".parquet":
+        return ParquetSink(path, **kwargs)
+    raise ValueError(f"Desteklenmeyen sonuç dosyası: {path} ({', '.join(SINK_FORMATS)})")
+
+
+def _from_text(record):
+    # CSV/Parquet keep lines as JSON text; CSV also stringifies every value
+    record = dict(record)
+    if isinstance(record.get("lines"), str):
+        record["lines"] = json.loads(record["lines"]) if record["lines"] else []
+    if isinstance(record.get("angle"), str):
+        record["angle"] = float(record["angle"] or 0.0)
+    if isinstance(record.get("is_confirmed"), str):
+        record["is_confirmed"] = record["is_confirmed"] == "True"
+    return record
+
+
+def read_records(path):
+    """
+    Yields item_record dicts from a sink file, in write order.
+    A truncated last line (crash during a write) is skipped.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    elif ext == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for record in csv.DictReader(f):
+                if None in record.values():
+                    continue # Short row
+                yield _from_text(record)
+    elif ext == ".parquet":
+        import pyarrow.parquet as pq
+        for part in _parquet_parts(path):
+            for batch in pq.ParquetFile(part).iter_batches():
+                for record in batch.to_pylist():
+                    yield _from_text(record)
+    else:
+        raise ValueError(f"Desteklenmeyen sonuç dosyası: {path} ({', '.join(SINK_FORMATS)})")
+
+
+def latest_records(path):
+    """Last record per file path (re-analysis and corrections overwrite earlier lines)."""
+    latest = {}
+    for record in read_records(path):
+        latest[record["path"]] = record
+    return list(latest.values())
+
+
+def export_excel(sink_path, xlsx_path):
+    """Builds the Excel table from a sink file. Returns the row count."""
+    rows = sort_rows([record_row(r) for r in latest_records(sink_path)])
+    import pandas as pd # Deferred: only needed for export
+    pd.DataFrame(rows).to_excel(xlsx_path, index=False)
+    return len(rows)
@@ -0,0 +1,66 @@
+import threading
+
+# Turkish letters folded to their ASCII base so "sahin" finds "ŞAHİN" and
+# "emir" finds "EMIR" / "Emır" (DICOM names are often stored without diacritics)
+_FOLD = str.maketrans({
+    "İ": "i", "I": "i", "ı": "i",
+    "Ş": "s", "ş": "s", "Ğ": "g", "ğ": "g",
+    "Ç": "c", "ç": "c", "Ö": "o", "ö": "o", "Ü": "u", "ü": "u",
+    "^": " ", "_": " ",
+})
+
+
+def fold_text(text):
+    """Case/diacritic-insensitive search key (Turkish-aware: İ/I/ı all become i)."""
+    # Translate before lower(): "İ".lower() would give "i" + combining dot
+    return " ".join(str(text).translate(_FOLD).lower().split())
+
+
+class SearchIndex:
+    """
+    Prebuilt search keys (patient name + ID) aligned with table rows.
+    match() narrows the previous result when the new query extends it, so
+    typing one more letter only rescans the rows that still matched.
+    """
+
+    def __init__(self):
+        self.keys = [] # row -> folded "name id"
+        self.query = ""
+        self.rows = None # Rows matching self.query (None: no filter)
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self.keys = []
+            self.query = ""
+            self.rows = None
+
+    def add(self, items):
+        """Appends keys for new rows; rows matching the active query join the result."""
+        with self._lock:
+            first = len(self.keys)
+            new_keys = [fold_text(f"{item.patient_name} {item.patient_id}") for item in items]
+            self.keys.extend(new_keys)
+            if self.rows is not None:
+                self.rows.update(row for row, key in enumerate(new_keys, first) if self.query in key)
+
+    def match(self, text):
+        """Returns the set of matching rows, or None when text is empty (show all)."""
+        query = fold_text(text)
+        with self._lock:
+            if not query:
+                self.query, self.rows = "", None
+                return None
+            if self.rows is not None and self.query in query:
+                # Narrowing: anything matching the longer query matched the shorter one
+                candidates = self.rows
+            else:
+                candidates = range(len(self.keys))
+            keys = self.keys
+            self.rows = {row for row in candidates if query in keys[row]}
+            self.query = query
+            return self.rows
+
+    def accepts(self, row):
+        rows = self.rows
+        return rows is None or row in rows
@@ -0,0 +1,45 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """
+    Accumulates wall-clock time and call counts per pipeline stage.
+    Thread-safe so a single instance can be shared by batch workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals = {}  # stage -> seconds
+        self.counts = {}  # stage -> calls
+
+    def reset(self):
+        with self._lock:
+            self.totals = {}
+            self.counts = {}
+
+    def add(self, name, seconds, count=1):
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + count
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        """Returns {stage: (count, total_seconds)}."""
+        with self._lock:
+            return {k: (self.counts.get(k, 0), v) for k, v in self.totals.items()}
+
+    def summary(self):
+        lines = []
+        for name, (count, total) in self.snapshot().items():
+            avg_ms = (total / count * 1000.0) if count else 0.0
+            lines.append(f"{name:<10} {count:>6}x  ort. {avg_ms:8.1f} ms  toplam {total:8.2f} s")
+        return "\n".join(lines)
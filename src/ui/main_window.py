@@ -1,12 +1,15 @@
-import os
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QTabWidget)
+from PySide6.QtCore import Signal, QTimer
 from src.ui.styles import DARK_THEME
 from src.ui.modules.pes_planus import PesPlanusWidget
 from src.ui.modules.free_drawing import FreeDrawingWidget
 from src.ui.modules.batch_analysis import BatchAnalysisWidget
+from src.ai import registry
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    model_ready = Signal(bool) # Emitted from the warm-up thread (queued to GUI)
+
+    def __init__(self, warm_up=True):
         super().__init__()
         self.setWindowTitle("Pes Planus Analiz & Medical Workstation")
         self.resize(1400, 900)
@@ -14,6 +17,23 @@ class MainWindow(QMainWindow):
         
         self.init_ui()
         
+        # Load the shared model once the window is on screen
+        self.model_ready.connect(self.on_model_ready)
+        if warm_up:
+            QTimer.singleShot(0, self.start_warm_up)
+
+    def start_warm_up(self):
+        if registry.is_ready():
+            return
+        self.statusBar().showMessage("⏳ Yapay zeka modeli arka planda hazırlanıyor...")
+        registry.warm_up(callback=self.model_ready.emit)
+
+    def on_model_ready(self, ok):
+        if ok:
+            self.statusBar().showMessage("✅ Yapay zeka modeli hazır.", 5000)
+        else:
+            self.statusBar().showMessage("⚠ Yapay zeka modeli yüklenemedi.")
+        
     def init_ui(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -54,6 +74,11 @@ class MainWindow(QMainWindow):
         # Connect Signals
         self.batch_analysis_widget.patient_selected.connect(self.on_batch_patient_selected)
 
+    def closeEvent(self, event):
+        # Tab pages get no closeEvent of their own; stop a running single-image analysis here
+        self.pes_planus_widget.stop_analysis()
+        super().closeEvent(event)
+
     def on_batch_patient_selected(self, name, pid, side):
         # Switch to analysis tab? Optional. User might just want to see info.
         # self.tabs.setCurrentWidget(self.pes_planus_widget)
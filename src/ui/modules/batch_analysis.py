@@ -1,15 +1,22 @@
-import os
-import pandas as pd
+import time
+import queue
+import threading
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                               QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, 
-                               QLabel, QMessageBox, QCheckBox, QDialog, QDialogButtonBox, QAbstractItemView,
-                               QLineEdit)
-from PySide6.QtCore import Qt, Signal, QSize, QThread
-from PySide6.QtGui import QIcon, QColor
+                               QTableView, QHeaderView, QFileDialog, 
+                               QLabel, QMessageBox, QDialog, QDialogButtonBox, QAbstractItemView,
+                               QLineEdit, QSpinBox, QComboBox, QProgressDialog, QCheckBox)
+from PySide6.QtCore import Qt, Signal, QThread, QTimer
 
-from src.core.batch_processor import BatchWorker, BatchItem
+from src.core.batch_processor import BatchWorker
+from src.core.folder_scanner import FolderScanner, scan_items
+from src.ai.analyzer import SIDE_POLICY_OCR_ALWAYS, SIDE_POLICY_TAG_FIRST, SIDE_POLICY_OCR_OFF
 from src.ui.modules.pes_planus import PesPlanusWidget
-from src.core.dicom_loader import load_image_array, load_dicom_array
+from src.ui.modules.batch_table import (BatchTableModel, BatchFilterProxy, CheckBoxDelegate, ButtonDelegate,
+                                        ItemRole, COL_CONFIRM, COL_NAME, COL_ACTION, COL_PATH)
+from src.core.dicom_loader import load_array_cached
+from src.core.report_builder import ReportBuilder
+from src.core.result_cache import ResultCache
+from src.core.result_sink import JsonlSink, new_run_path, export_excel
 from src.core.geometry import calculate_angle, get_angle_classification
 
 class ReviewDialog(QDialog):
@@ -40,14 +47,14 @@ class ReviewDialog(QDialog):
         layout.addWidget(btn_box)
         
         self.load_data()
+
+    def done(self, result):
+        self.analyzer_widget.stop_analysis()
+        super().done(result)
         
     def load_data(self):
         # Load Image
-        ext = os.path.splitext(self.batch_item.path)[1].lower()
-        if ext == '.dcm':
-            arr, meta = load_dicom_array(self.batch_item.path)
-        else:
-            arr, meta = load_image_array(self.batch_item.path)
+        arr, meta = load_array_cached(self.batch_item.path) # Kept for report generation
             
         if arr is None:
             QMessageBox.critical(self, "Hata", "Görüntü yüklenemedi.")
@@ -56,6 +63,7 @@ class ReviewDialog(QDialog):
 
         # Manually set image
         self.analyzer_widget.current_image_array = arr
+        self.analyzer_widget.current_metadata = meta
         height, width = arr.shape
         from PySide6.QtGui import QImage, QPixmap
         q_img = QImage(arr.data, width, height, width, QImage.Format.Format_Grayscale8)
@@ -103,33 +111,82 @@ class ReviewDialog(QDialog):
         return None
 
 class FileScannerWorker(QThread):
-    found_file = Signal(str) # path
+    found_files = Signal(list) # Chunk of BatchItems (DICOM header already applied)
     finished_scan = Signal(int) # count
     
-    def __init__(self, folder_path):
+    def __init__(self, folder_path, chunk_size=500, chunk_interval=0.2, cache=None, verify_files=False):
         super().__init__()
         self.folder_path = folder_path
-        self.extensions = {'.dcm', '.dicom', '.jpg', '.jpeg', '.png', '.bmp'}
+        self.cache = cache # Cache lookups happen here, off the GUI thread
+        # Parallel scandir + manifest of the previous scan
+        self.scanner = FolderScanner(folder_path, verify_files=verify_files)
+        self.chunk_size = chunk_size # Emit after this many items...
+        self.chunk_interval = chunk_interval # ...or this many seconds, whichever comes first
         self.is_running = True
 
+    def _produce(self, found, done):
+        # Scan (and cache lookups) on a helper thread so run() can flush on time even while it stalls
+        try:
+            for item in scan_items(self.folder_path, should_stop=lambda: not self.is_running, scanner=self.scanner):
+                if self.cache:
+                    self.cache.apply(item) # Previously analyzed / confirmed studies
+                found.put(item)
+        except Exception as e:
+            print(f"Tarama hatası: {e}")
+        finally:
+            found.put(done)
+
     def run(self):
         count = 0
-        for root, dirs, files in os.walk(self.folder_path):
-            if not self.is_running:
+        chunk = []
+        last_emit = time.monotonic()
+        found = queue.Queue()
+        done = object()
+        producer = threading.Thread(target=self._produce, args=(found, done), daemon=True)
+        producer.start()
+        while True:
+            # Wait for the next item, but never past the chunk deadline while items are pending
+            timeout = max(0.0, self.chunk_interval - (time.monotonic() - last_emit)) if chunk else None
+            try:
+                item = found.get(timeout=timeout)
+            except queue.Empty:
+                item = None # Deadline reached: a slow share or header read must not hide found items
+            if item is done:
                 break
-            for file in files:
-                if not self.is_running:
-                    break
-                ext = os.path.splitext(file)[1].lower()
-                if ext in self.extensions:
-                    full_path = os.path.join(root, file)
-                    self.found_file.emit(full_path)
-                    count += 1
+            if item is not None:
+                chunk.append(item)
+                count += 1
+            if chunk and (item is None or len(chunk) >= self.chunk_size
+                          or time.monotonic() - last_emit >= self.chunk_interval):
+                self.found_files.emit(chunk)
+                chunk = []
+                last_emit = time.monotonic()
+        producer.join()
+        if chunk:
+            self.found_files.emit(chunk)
+        print(f"Tarama: {self.scanner.summary()}")
         self.finished_scan.emit(count)
 
     def stop(self):
         self.is_running = False
 
+class ReportWorker(QThread):
+    """Builds the ZIP report off the GUI thread; cancel via requestInterruption()."""
+    progress = Signal(int, int) # current, total
+    finished_report = Signal(int, str) # image count (-1: cancelled), error message
+
+    def __init__(self, items, zip_path):
+        super().__init__()
+        self.zip_path = zip_path
+        self.builder = ReportBuilder(items, zip_path)
+
+    def run(self):
+        try:
+            count = self.builder.build(self.progress.emit, self.isInterruptionRequested)
+            self.finished_report.emit(-1 if count is None else count, "")
+        except Exception as e:
+            self.finished_report.emit(0, str(e))
+
 class BatchAnalysisWidget(QWidget):
     patient_selected = Signal(str, str, str) # name, id, side
 
@@ -138,6 +195,14 @@ class BatchAnalysisWidget(QWidget):
         self.items = [] # List of BatchItem
         self.worker = None
         self.scanner = None
+        self.sink = None # Results of the loaded folder, appended as items finish
+        self.report_worker = None
+        self.report_progress = None
+        try:
+            self.cache = ResultCache()
+        except Exception as e:
+            print(f"Sonuç önbelleği açılamadı: {e}")
+            self.cache = None
         self.init_ui()
         
     def init_ui(self):
@@ -163,14 +228,39 @@ class BatchAnalysisWidget(QWidget):
         self.btn_stop.setStyleSheet("background-color: #d63031; color: white;")
         self.btn_stop.setEnabled(False)
         
+        self.spin_batch = QSpinBox()
+        self.spin_batch.setRange(1, 64)
+        self.spin_batch.setValue(8)
+        self.spin_batch.setPrefix("Batch: ")
+        self.spin_batch.setToolTip("Tek seferde modele verilen görüntü sayısı")
+        
+        self.combo_mode = QComboBox()
+        self.combo_mode.addItem("Tek Süreç", "thread")
+        self.combo_mode.addItem("Çoklu Süreç (Tüm Çekirdekler)", "process")
+        self.combo_mode.setToolTip("Çoklu süreç modunda her çekirdek kendi modelini yükler")
+        
+        self.combo_side = QComboBox()
+        self.combo_side.addItem("Taraf: OCR Öncelikli", SIDE_POLICY_OCR_ALWAYS)
+        self.combo_side.addItem("Taraf: DICOM Etiketi Öncelikli", SIDE_POLICY_TAG_FIRST)
+        self.combo_side.addItem("Taraf: OCR Kapalı", SIDE_POLICY_OCR_OFF)
+        self.combo_side.setToolTip("Etiket öncelikli modda OCR yalnızca etiket/dosya adı tarafı vermezse çalışır")
+        
+        self.chk_verify = QCheckBox("Dosyaları denetle")
+        self.chk_verify.setToolTip("Değişmemiş klasörleri de yeniden listeler; yerinde yeniden yazılan dosyaları yakalar, "
+                                   "büyük ağ klasörlerinde taramayı yavaşlatır")
+        
         self.txt_search = QLineEdit()
         self.txt_search.setPlaceholderText("🔍 İsim veya ID ile ara...")
-        self.txt_search.textChanged.connect(self.filter_results)
+        self.txt_search.textChanged.connect(self.on_search_changed)
         self.txt_search.setFixedWidth(200)
         
         top_layout.addWidget(btn_load)
         top_layout.addWidget(self.btn_start)
         top_layout.addWidget(self.btn_stop)
+        top_layout.addWidget(self.spin_batch)
+        top_layout.addWidget(self.combo_mode)
+        top_layout.addWidget(self.combo_side)
+        top_layout.addWidget(self.chk_verify)
         top_layout.addSpacing(20)
         top_layout.addWidget(self.txt_search)
         top_layout.addStretch()
@@ -178,18 +268,34 @@ class BatchAnalysisWidget(QWidget):
         
         layout.addLayout(top_layout)
         
-        # 2. Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(9)
+        # 2. Table (model/view: rows are painted on demand, no per-row widgets)
+        self.model = BatchTableModel(self)
+        self.model.confirm_changed.connect(self.update_confirm)
+        self.proxy = BatchFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder) # Keep scan order until a header is clicked
         self.table.setSortingEnabled(True) # Enable Header Sorting
-        self.table.setHorizontalHeaderLabels([
-            "Onay", "Durum", "ID", "İsim", "Taraf", "Açı", "Tanı", "İşlem", "Dosya Yolu"
-        ])
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
-        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch) # Name stretches
+        # ResizeToContents would measure every row; fixed widths keep large tables fast
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setSectionResizeMode(COL_NAME, QHeaderView.Stretch) # Name stretches
+        self.table.verticalHeader().setDefaultSectionSize(26)
         self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.table.hideColumn(8) # Hide Path
-        self.table.itemClicked.connect(self.on_table_clicked)
+        self.table.hideColumn(COL_PATH) # Hide Path
+        self.check_delegate = CheckBoxDelegate(self.table)
+        self.table.setItemDelegateForColumn(COL_CONFIRM, self.check_delegate)
+        self.review_delegate = ButtonDelegate(self.table)
+        self.review_delegate.clicked.connect(lambda index: self.review_item(index.data(ItemRole)))
+        self.table.setItemDelegateForColumn(COL_ACTION, self.review_delegate)
+        self.table.clicked.connect(self.on_table_clicked)
+        
+        # Search runs once typing pauses, not on every keystroke
+        self.search_timer = QTimer(self)
+        self.search_timer.setInterval(150)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.timeout.connect(lambda: self.filter_results(self.txt_search.text()))
         
         layout.addWidget(self.table)
         
@@ -208,30 +314,17 @@ class BatchAnalysisWidget(QWidget):
         
         layout.addLayout(bottom_layout)
     
-    def on_table_clicked(self, item):
-        row = item.row()
-        path = self.table.item(row, 8).text()
-        # Find item
-        batch_item = next((i for i in self.items if i.path == path), None)
+    def on_table_clicked(self, index):
+        batch_item = index.data(ItemRole)
         if batch_item:
             self.patient_selected.emit(batch_item.patient_name, batch_item.patient_id, batch_item.side)
 
+    def on_search_changed(self, text):
+        self.search_timer.start() # Restarts the debounce interval
+
     def filter_results(self, text):
-        """Filters table rows by Name (Col 3) or ID (Col 2)."""
-        text = text.lower().strip()
-        for row in range(self.table.rowCount()):
-            id_item = self.table.item(row, 2)
-            name_item = self.table.item(row, 3)
-            
-            if not id_item or not name_item: continue
-            
-            id_val = id_item.text().lower()
-            name_val = name_item.text().lower()
-            
-            if text in id_val or text in name_val:
-                self.table.setRowHidden(row, False)
-            else:
-                self.table.setRowHidden(row, True)
+        """Filters table rows by Name or ID (prebuilt, Turkish-aware index; one bulk refilter)."""
+        self.proxy.set_search(text)
 
     def load_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Klasör Seç")
@@ -239,73 +332,58 @@ class BatchAnalysisWidget(QWidget):
             return
             
         self.items = []
-        self.table.setRowCount(0)
+        self.model.clear()
+        self.open_sink()
         self.lbl_count.setText("Taranıyor...")
         self.btn_start.setEnabled(False)
         
         # Start Scanner Thread
-        self.scanner = FileScannerWorker(folder)
-        self.scanner.found_file.connect(self.on_file_found)
+        self.scanner = FileScannerWorker(folder, cache=self.cache, verify_files=self.chk_verify.isChecked())
+        self.scanner.found_files.connect(self.on_files_found)
         self.scanner.finished_scan.connect(self.on_scan_finished)
         self.scanner.start()
 
-    def on_file_found(self, path):
-        item = BatchItem(path)
-        self.items.append(item)
-        self.add_row(item)
+    def open_sink(self):
+        """Starts a new result file for the folder being loaded."""
+        if self.sink:
+            self.sink.close()
+            self.sink = None
+        try:
+            self.sink = JsonlSink(new_run_path())
+            print(f"Sonuçlar yazılıyor: {self.sink.path}")
+        except Exception as e:
+            print(f"Sonuç dosyası açılamadı: {e}")
+
+    def record_result(self, item):
+        if self.sink:
+            try:
+                self.sink.write(item)
+            except Exception as e:
+                print(f"Sonuç yazılamadı: {e}")
+
+    def on_files_found(self, items):
+        """Ingests one scanner chunk with a single model insert."""
+        for item in items:
+            self.record_result(item) # Cache hits are already finished results
+        self.items.extend(items)
+        self.model.add_items(items)
         self.lbl_count.setText(f"{len(self.items)} dosya bulundu...")
 
     def on_scan_finished(self, count):
         self.lbl_count.setText(f"{count} Dosya Hazır")
+        if self.scanner:
+            # Added / removed / modified since the last scan of this folder
+            self.lbl_count.setToolTip(self.scanner.scanner.summary())
         if count > 0:
             self.btn_start.setEnabled(True)
         else:
             QMessageBox.information(self, "Bilgi", "Seçilen klasörde uygun görsel bulunamadı.")
             
-    def add_row(self, item: BatchItem):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        
-        # 0. Checkbox
-        chk_widget = QWidget()
-        chk_layout = QHBoxLayout(chk_widget)
-        chk_layout.setContentsMargins(0,0,0,0)
-        chk_layout.setAlignment(Qt.AlignCenter)
-        chk = QCheckBox()
-        chk.setChecked(item.is_confirmed)
-        chk.stateChanged.connect(lambda s, i=item: self.update_confirm(i, s))
-        chk_layout.addWidget(chk)
-        self.table.setCellWidget(row, 0, chk_widget)
-        
-        # 1. Status
-        self.table.setItem(row, 1, QTableWidgetItem(item.status))
-        
-        # 2. ID
-        self.table.setItem(row, 2, QTableWidgetItem(item.patient_id))
-        
-        # 3. Name
-        self.table.setItem(row, 3, QTableWidgetItem(item.patient_name))
-        
-        # 4. Side
-        self.table.setItem(row, 4, QTableWidgetItem(item.side))
-        
-        # 5. Angle
-        self.table.setItem(row, 5, QTableWidgetItem(f"{item.angle:.1f}°" if item.angle else "-"))
-        
-        # 6. Diagnosis
-        self.table.setItem(row, 6, QTableWidgetItem(item.diagnosis))
-        
-        # 7. Action
-        btn_review = QPushButton("Kontrol Et")
-        btn_review.setStyleSheet("height: 20px; font-size: 11px;")
-        btn_review.clicked.connect(lambda _, i=item: self.review_item(i))
-        self.table.setCellWidget(row, 7, btn_review)
-        
-        # 8. Path (Hidden) - Tip: We can verify this stores the full path.
-        self.table.setItem(row, 8, QTableWidgetItem(item.path))
-
-    def update_confirm(self, item, state):
-        item.is_confirmed = (state == 2) # 2 is Checked
+    def update_confirm(self, item):
+        # is_confirmed was already set by the model's checkbox
+        if self.cache:
+            self.cache.put(item)
+        self.record_result(item)
 
     def start_analysis(self):
         self.btn_start.setEnabled(False)
@@ -316,7 +394,14 @@ class BatchAnalysisWidget(QWidget):
         # If user wants to re-run, they reload? Or we reset status.
         # For now, just run.
         
-        self.worker = BatchWorker(self.items)
+        mode = self.combo_mode.currentData()
+        self.worker = BatchWorker(
+            self.items,
+            batch_size=self.spin_batch.value(),
+            mode=mode,
+            cache=self.cache,
+            side_policy=self.combo_side.currentData(),
+        )
         self.worker.progress.connect(self.on_progress)
         self.worker.item_finished.connect(self.on_item_finished)
         self.worker.finished_all.connect(self.on_finished)
@@ -332,34 +417,8 @@ class BatchAnalysisWidget(QWidget):
         self.lbl_count.setText(f"İşleniyor: {current}/{total}")
 
     def on_item_finished(self, path, updated_item):
-        # Update Row
-        row = -1
-        # Optimize search? Linear is fine for <1000 items
-        for r in range(self.table.rowCount()):
-            if self.table.item(r, 8).text() == path:
-                row = r
-                break
-        
-        if row != -1:
-            self.table.item(row, 1).setText(updated_item.status)
-            self.table.item(row, 2).setText(updated_item.patient_id)
-            self.table.item(row, 3).setText(updated_item.patient_name)
-            self.table.item(row, 4).setText(updated_item.side)
-            self.table.item(row, 5).setText(f"{updated_item.angle:.1f}°")
-            
-            # Diagnosis Coloring
-            diag_item = QTableWidgetItem(updated_item.diagnosis)
-            if updated_item.diagnosis == "Pes Planus":
-                diag_item.setForeground(QColor("red"))
-            elif updated_item.diagnosis == "Normal":
-                 diag_item.setForeground(QColor("green"))
-            self.table.setItem(row, 6, diag_item)
-            
-            # Confirm if error? No.
-            if updated_item.status == "Hata":
-                 self.table.item(row, 1).setBackground(QColor("#ff7675"))
-            else:
-                 self.table.item(row, 1).setBackground(QColor("transparent"))
+        self.record_result(updated_item)
+        self.model.item_changed(path)
 
     def on_finished(self):
         self.btn_start.setEnabled(True)
@@ -376,194 +435,57 @@ class BatchAnalysisWidget(QWidget):
                 item.angle = data["angle"]
                 item.diagnosis = data["diagnosis"]
                 item.is_confirmed = True # Auto-confirm
+                if self.cache:
+                    self.cache.put(item) # Manual corrections survive restarts
                 
-                # Update UI row immediately
+                # Update UI row immediately, checkbox included (also appends the corrected record)
                 self.on_item_finished(item.path, item)
-                
-                # Update checkbox
-                row = -1
-                for r in range(self.table.rowCount()):
-                    if self.table.item(r, 8).text() == item.path:
-                        row = r
-                        break
-                if row != -1:
-                    widget = self.table.cellWidget(row, 0)
-                    if widget:
-                         # Find checkbox in layout
-                         chk = widget.findChild(QCheckBox)
-                         if chk: chk.setChecked(True)
 
     def export_excel(self):
         if not self.items: return
+        if not self.sink or self.sink.count == 0:
+            QMessageBox.information(self, "Bilgi", "Henüz kaydedilmiş analiz sonucu yok.")
+            return
         
         path, _ = QFileDialog.getSaveFileName(self, "Excel Olarak Kaydet", "", "Excel Files (*.xlsx)")
         if not path: return
         
-        data = []
-        for item in self.items:
-            data.append({
-                "Dosya Adı": item.filename,
-                "Hasta ID": item.patient_id,
-                "Dizi Adı": item.patient_name,
-                "Taraf": item.side,
-                "Açı": item.angle,
-                "Tanı": item.diagnosis,
-                "Durum": item.status,
-                "Onaylandı": "Evet" if item.is_confirmed else "Hayır"
-            })
-            
-        # Custom Sort: ID/Name Ascending, Side Descending (R first) or custom priority
-        # Let's use a lambda: (Name, 0 if R else 1)
-        data.sort(key=lambda x: (
-            x["Dizi Adı"], 
-            x["Hasta ID"],
-            0 if x["Taraf"] in ["R", "Right", "Sag", "Sağ"] else 1
-        ))
-
-        df = pd.DataFrame(data)
+        # Built from the streamed result file, not from the in-memory table
         try:
-            df.to_excel(path, index=False)
+            export_excel(self.sink.path, path)
             QMessageBox.information(self, "Başarılı", "Excel dosyası başarıyla kaydedildi.")
         except Exception as e:
             QMessageBox.critical(self, "Hata", f"Excel kaydedilemedi:\n{e}")
 
     def create_report(self):
         if not self.items: return
+        if self.report_worker and self.report_worker.isRunning(): return
         
         # Select Save Path
         zip_path, _ = QFileDialog.getSaveFileName(self, "Raporu Kaydet (Zip)", "", "Zip Files (*.zip)")
         if not zip_path: return
         
-        # Dependencies locally
-        import zipfile
-        import tempfile
-        import shutil
-        import cv2
-        import numpy as np
-        
-        # Create Temp Dir
-        temp_dir = tempfile.mkdtemp()
-        images_dir = os.path.join(temp_dir, "Incelenen_Goruntuler")
-        os.makedirs(images_dir)
-        
-        processed_data = [] # For Excel inside Zip
-        
-        try:
-            # Sort items first? No, we might as well process them all then sort the list of dicts.
-            # But maybe sorting `self.items` helps images appear in order in folder?
-            # Let's sort the `processed_data` list before saving excel.
-            
-            # Process Items
-            for item in self.items:
-                # Filter: Only processed ones or all? Let's take anything with valid angle or status
-                if item.status == "Hata" or not item.lines:
-                     continue
-                     
-                # 1. Load Image
-                try:
-                    if os.path.splitext(item.path)[1].lower() in ['.dcm', '.dicom']:
-                        img_arr, _ = load_dicom_array(item.path)
-                    else:
-                        img_arr, _ = load_image_array(item.path)
-                        
-                    if img_arr is None: continue
-                    
-                    # Convert to BGR for drawing
-                    vis_img = cv2.cvtColor(img_arr, cv2.COLOR_GRAY2BGR)
-                    
-                    # 2. Draw Lines
-                    lines = item.lines
-                    if len(lines) >= 2:
-                        calc_pts = lines[0] # ((x1,y1), (x2,y2))
-                        ground_pts = lines[1]
-                        
-                        # Convert float/tuples to int points
-                        c1 = (int(calc_pts[0][0]), int(calc_pts[0][1]))
-                        c2 = (int(calc_pts[1][0]), int(calc_pts[1][1]))
-                        g1 = (int(ground_pts[0][0]), int(ground_pts[0][1]))
-                        g2 = (int(ground_pts[1][0]), int(ground_pts[1][1]))
-                        
-                        # Draw Calcaneus (Magenta)
-                        cv2.line(vis_img, c1, c2, (255, 0, 255), 3)
-                        # Draw Ground (Cyan)
-                        cv2.line(vis_img, g1, g2, (255, 255, 0), 2)
-                        
-                        # Draw Text Box
-                        angle_txt = f"{item.angle:.1f} deg"
-                        diag_txt = item.diagnosis
-                        
-                        # Position text
-                        txt_x = (c1[0] + c2[0]) // 2
-                        txt_y = (c1[1] + c2[1]) // 2 - 40
-                        
-                        # Draw background for text
-                        (tw, th), _ = cv2.getTextSize(f"{angle_txt} | {diag_txt}", cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
-                        cv2.rectangle(vis_img, (txt_x-10, txt_y-th-10), (txt_x+tw+10, txt_y+10), (0,0,0), -1)
-                        
-                        cv2.putText(vis_img, f"{angle_txt}", (txt_x, txt_y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255,255,255), 2)
-                        
-                        # Color for diagnosis
-                        d_color = (0, 255, 0) # Green default
-                        if "Pes Planus" in diag_txt: d_color = (0, 0, 255) # Red (BGR)
-                        elif "Sınırda" in diag_txt: d_color = (0, 165, 255) # Orange
-                        
-                        cv2.putText(vis_img, f"{diag_txt}", (txt_x, txt_y + 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, d_color, 2)
-                        
-                        # Draw Patient Info Top Left
-                        info_txt = f"{item.patient_name} ({item.side})"
-                        cv2.putText(vis_img, info_txt, (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (200, 200, 200), 2)
+        self.report_worker = ReportWorker(self.items, zip_path)
+        self.report_progress = QProgressDialog("Rapor hazırlanıyor...", "İptal", 0, len(self.report_worker.builder.records), self)
+        self.report_progress.setWindowTitle("Rapor Oluştur")
+        self.report_progress.setWindowModality(Qt.WindowModal)
+        self.report_progress.setMinimumDuration(0)
+        self.report_progress.canceled.connect(self.report_worker.requestInterruption)
+        self.report_worker.progress.connect(self.on_report_progress)
+        self.report_worker.finished_report.connect(self.on_report_finished)
+        self.report_worker.start()
 
-                    # 3. Save Image
-                    safe_name = f"{item.patient_name}_{item.patient_id}_{item.side}_{item.angle:.1f}".replace(" ", "_")
-                    safe_name = "".join([c for c in safe_name if c.isalnum() or c in ('_', '-')])
-                    out_path = os.path.join(images_dir, f"{safe_name}.jpg")
-                    
-                    # Use imencode to support unicode paths in imwrite if needed, though temp path is usually safe.
-                    # But patient name might have unicode.
-                    is_success, buffer = cv2.imencode(".jpg", vis_img)
-                    if is_success:
-                        with open(out_path, "wb") as f:
-                            f.write(buffer)
-                            
-                    processed_data.append({
-                        "Dosya": item.filename,
-                        "Hasta İsim": item.patient_name,
-                        "ID": item.patient_id,
-                        "Taraf": item.side,
-                        "Açı": item.angle,
-                        "Tanı": item.diagnosis,
-                        "Görsel": f"Incelenen_Goruntuler/{safe_name}.jpg"
-                    })
-                    
-                except Exception as e:
-                    print(f"Error processing {item.filename}: {e}")
-                    continue
-            
-            # 4. Create Excel inside Temp
-            if processed_data:
-                # Custom Sort: ID/Name Ascending, Side Descending (R first)
-                processed_data.sort(key=lambda x: (
-                    x["Hasta İsim"], 
-                    x["ID"],
-                    0 if x["Taraf"] in ["R", "Right", "Sag", "Sağ"] else 1
-                ))
-                
-                df = pd.DataFrame(processed_data)
-                excel_path = os.path.join(temp_dir, "Ozet_Tablo.xlsx")
-                df.to_excel(excel_path, index=False)
-                
-            # 5. Zip It
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        # Archive name (relative to temp_dir)
-                        arcname = os.path.relpath(file_path, temp_dir)
-                        zipf.write(file_path, arcname)
-                        
+    def on_report_progress(self, current, total):
+        if self.report_progress:
+            self.report_progress.setValue(current)
+            self.report_progress.setLabelText(f"Rapor hazırlanıyor: {current}/{total}")
+
+    def on_report_finished(self, count, error):
+        zip_path = self.report_worker.zip_path
+        if self.report_progress:
+            self.report_progress.reset()
+            self.report_progress = None
+        if error:
+            QMessageBox.critical(self, "Hata", f"Rapor oluşturulurken hata: {error}")
+        elif count >= 0:
             QMessageBox.information(self, "Başarılı", f"Rapor oluşturuldu:\n{zip_path}")
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Hata", f"Rapor oluşturulurken hata: {e}")
-        finally:
-            shutil.rmtree(temp_dir)
@@ -0,0 +1,195 @@
+from PySide6.QtWidgets import QStyledItemDelegate, QStyle, QStyleOptionButton, QStyleOptionViewItem, QApplication
+from PySide6.QtCore import Qt, Signal, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QEvent, QRect
+from PySide6.QtGui import QColor
+
+from src.core.search_index import SearchIndex
+
+# Column layout of the batch results table
+COL_CONFIRM, COL_STATUS, COL_ID, COL_NAME, COL_SIDE, COL_ANGLE, COL_DIAGNOSIS, COL_ACTION, COL_PATH = range(9)
+HEADERS = ["Onay", "Durum", "ID", "İsim", "Taraf", "Açı", "Tanı", "İşlem", "Dosya Yolu"]
+
+ItemRole = Qt.UserRole # BatchItem of the row
+SortRole = Qt.UserRole + 1 # Raw value used by the proxy for sorting
+
+
+class BatchTableModel(QAbstractTableModel):
+    """
+    Table model over a list of BatchItems. Rows are drawn on demand by the
+    view, so no per-row widgets exist; the confirm checkbox and review button
+    are painted by delegates.
+    Rows are append-only and never reordered here (sorting/filtering live in
+    the proxy), so the path -> source row index stays valid in every view state.
+    """
+    confirm_changed = Signal(object) # BatchItem
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items = []
+        self.rows = {} # path -> source row
+        self.search = SearchIndex() # Name/ID keys, row-aligned with items
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADERS[section]
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == COL_CONFIRM:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self.items[index.row()]
+        col = index.column()
+
+        if role == ItemRole:
+            return item
+        if role == Qt.CheckStateRole and col == COL_CONFIRM:
+            return Qt.Checked if item.is_confirmed else Qt.Unchecked
+        if role == Qt.DisplayRole:
+            if col == COL_STATUS: return item.status
+            if col == COL_ID: return item.patient_id
+            if col == COL_NAME: return item.patient_name
+            if col == COL_SIDE: return item.side
+            if col == COL_ANGLE: return f"{item.angle:.1f}°" if item.angle or item.status == "Tamamlandı" else "-"
+            if col == COL_DIAGNOSIS: return item.diagnosis
+            if col == COL_ACTION: return "Kontrol Et"
+            if col == COL_PATH: return item.path
+            return None
+        if role == SortRole:
+            if col == COL_CONFIRM: return int(item.is_confirmed)
+            if col == COL_ANGLE: return float(item.angle)
+            return self.data(index, Qt.DisplayRole)
+        if role == Qt.ForegroundRole and col == COL_DIAGNOSIS:
+            # Diagnosis Coloring
+            if item.diagnosis == "Pes Planus": return QColor("red")
+            if item.diagnosis == "Normal": return QColor("green")
+        if role == Qt.BackgroundRole and col == COL_STATUS and item.status == "Hata":
+            return QColor("#ff7675")
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or index.column() != COL_CONFIRM:
+            return False
+        item = self.items[index.row()]
+        item.is_confirmed = Qt.CheckState(value) == Qt.Checked
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self.confirm_changed.emit(item)
+        return True
+
+    def add_items(self, items):
+        """Appends many items with a single insert notification."""
+        if not items:
+            return
+        first = len(self.items)
+        self.search.add(items) # Before the insert: the proxy filters the new rows during it
+        self.beginInsertRows(QModelIndex(), first, first + len(items) - 1)
+        self.items.extend(items)
+        for row, item in enumerate(items, first):
+            self.rows[item.path] = row
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.items = []
+        self.rows = {}
+        self.search.clear()
+        self.endResetModel()
+
+    def row_of(self, path):
+        """Source row of a path, or -1 (O(1))."""
+        return self.rows.get(path, -1)
+
+    def item_changed(self, path):
+        """Repaints the row of an updated item."""
+        row = self.row_of(path)
+        if row != -1:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(HEADERS) - 1))
+
+
+class BatchFilterProxy(QSortFilterProxyModel):
+    """Sorting by SortRole and filtering by name or ID through the model's SearchIndex."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(SortRole)
+
+    def set_search(self, text):
+        """Matches text against the prebuilt index, then refilters the view once."""
+        search = self.sourceModel().search
+        previous = search.rows
+        rows = search.match(text)
+        if rows is None and previous is None:
+            return # Nothing was hidden and nothing will be
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self.sourceModel().search.accepts(source_row)
+
+
+class CheckBoxDelegate(QStyledItemDelegate):
+    """Centered confirm checkbox bound to Qt.CheckStateRole."""
+
+    def _check_rect(self, option):
+        style = option.widget.style() if option.widget else QApplication.style()
+        size = style.subElementRect(QStyle.SE_CheckBoxIndicator, QStyleOptionButton(), option.widget).size()
+        rect = QRect(0, 0, size.width(), size.height())
+        rect.moveCenter(option.rect.center())
+        return rect
+
+    def paint(self, painter, option, index):
+        # Background/selection only; the checkbox itself is drawn below
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        style = option.widget.style() if option.widget else QApplication.style()
+        opt.features &= ~QStyleOptionViewItem.HasCheckIndicator
+        opt.text = ""
+        style.drawControl(QStyle.CE_ItemViewItem, opt, painter, option.widget)
+
+        button = QStyleOptionButton()
+        button.rect = self._check_rect(option)
+        button.state = QStyle.State_Enabled
+        checked = index.data(Qt.CheckStateRole) == Qt.Checked
+        button.state |= QStyle.State_On if checked else QStyle.State_Off
+        style.drawControl(QStyle.CE_CheckBox, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            if self._check_rect(option).contains(event.position().toPoint()):
+                checked = index.data(Qt.CheckStateRole) == Qt.Checked
+                return model.setData(index, Qt.Unchecked if checked else Qt.Checked, Qt.CheckStateRole)
+        return False
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """Painted push button; emits clicked(index) with the view (proxy) index."""
+    clicked = Signal(QModelIndex)
+
+    def paint(self, painter, option, index):
+        style = option.widget.style() if option.widget else QApplication.style()
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = index.data(Qt.DisplayRole) or ""
+        button.state = QStyle.State_Enabled | QStyle.State_Raised
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        size.setWidth(size.width() + 20)
+        return size
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            if option.rect.contains(event.position().toPoint()):
+                self.clicked.emit(index)
+                return True
+        return False
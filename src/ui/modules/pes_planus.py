@@ -1,20 +1,63 @@
 import os
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QFileDialog, QMessageBox, QToolBar, QGroupBox, QComboBox)
-from PySide6.QtCore import Qt, QSize
+from PySide6.QtCore import Qt, QSize, QThread, Signal, QCoreApplication
 from PySide6.QtGui import QAction, QActionGroup, QImage, QPixmap
 
 from src.ui.canvas import DrawingCanvas, DraggablePoint
 from src.core.dicom_loader import load_dicom_array, load_image_array
 from src.core.geometry import calculate_angle, get_angle_classification
-from src.ai.analyzer import PesPlanusAnalyzer
+from src.ai.registry import get_analyzer, is_ready, wait_for_warm_up
+
+STAGE_LABELS = {
+    "model": "📦 Model dosyaları yükleniyor (İlk çalıştırma biraz sürebilir)...",
+    "load": "🖼 Görüntü hazırlanıyor...",
+    "segment": "🤖 Segmentasyon (U-Net) çalışıyor...",
+    "geometry": "📐 Açı hesaplanıyor...",
+    "ocr": "🔎 Taraf işareti okunuyor (OCR)...",
+}
+
+STOP_WAIT_MS = 2000 # Longest the GUI waits for a cancelled job when closing
+
+class AnalysisJob(QThread):
+    """Runs a single-image analysis off the GUI thread; cancel via requestInterruption()."""
+    stage_changed = Signal(str) # load, segment, geometry, ocr (model: weights still loading)
+    result_ready = Signal(object) # result dict
+    failed = Signal(str)
+
+    def __init__(self, image, metadata=None, parent=None):
+        super().__init__(parent)
+        self.image = image
+        self.metadata = metadata
+
+    def run(self):
+        try:
+            if not is_ready():
+                self.stage_changed.emit("model")
+                wait_for_warm_up(self.isInterruptionRequested)
+            if self.isInterruptionRequested():
+                # Cancelled during warm-up: don't start (or wait on) the model load
+                self.result_ready.emit({"error": "Analiz iptal edildi", "cancelled": True})
+                return
+            analyzer = get_analyzer()
+            result = analyzer.analyze(
+                self.image,
+                self.metadata,
+                progress=self.stage_changed.emit,
+                should_cancel=self.isInterruptionRequested,
+                render=False, # The canvas draws result["lines"] itself
+            )
+            self.result_ready.emit(result)
+        except Exception as e:
+            self.failed.emit(str(e))
 
 class PesPlanusWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
 
         self.current_image_array = None
-        self.analyzer = None # Lazy load
+        self.current_metadata = None
+        self.job = None # Running AnalysisJob, if any
             
         self.init_ui()
         
@@ -107,6 +150,12 @@ class PesPlanusWidget(QWidget):
         self.btn_ai.clicked.connect(self.run_ai_analysis)
         ai_layout.addWidget(self.btn_ai)
         
+        self.btn_cancel = QPushButton("✖ İptal")
+        self.btn_cancel.setStyleSheet("background-color: #d63031; color: white;")
+        self.btn_cancel.clicked.connect(self.cancel_ai_analysis)
+        self.btn_cancel.setVisible(False)
+        ai_layout.addWidget(self.btn_cancel)
+        
         grp_ai.setLayout(ai_layout)
         side_layout.addWidget(grp_ai)
 
@@ -242,6 +291,7 @@ class PesPlanusWidget(QWidget):
         import numpy as np
         arr = np.ascontiguousarray(arr)
         self.current_image_array = arr
+        self.current_metadata = metadata
         
         # Display Metadata
         if metadata:
@@ -332,45 +382,81 @@ class PesPlanusWidget(QWidget):
         if self.current_image_array is None:
             QMessageBox.warning(self, "Uyarı", "Lütfen önce bir görüntü yükleyin.")
             return
+        if self.job is not None:
+            return
 
         self.lbl_status.setText("🤖 Analiz yapılıyor, lütfen bekleyin...")
         self.btn_ai.setEnabled(False)
-        self.setCursor(Qt.CursorShape.WaitCursor)
-        
-        from PySide6.QtWidgets import QApplication
-        QApplication.processEvents()
-        
-        # Lazy Load
-        if not self.analyzer:
-            self.lbl_status.setText("📦 Model dosyaları yükleniyor (İlk çalıştırma biraz sürebilir)...")
-            QApplication.processEvents()
-            try:
-                self.analyzer = PesPlanusAnalyzer()
-            except Exception as e:
-                self.btn_ai.setEnabled(True)
-                self.setCursor(Qt.CursorShape.ArrowCursor)
-                QMessageBox.critical(self, "Hata", f"Yapay zeka modeli yüklenemedi:\n{e}")
-                self.lbl_status.setText("Model yükleme hatası.")
-                return
+        self.btn_cancel.setVisible(True)
+        self.btn_cancel.setEnabled(True)
+        
+        # Canvas stays interactive (pan/zoom) while the job runs
+        # Metadata already read at open time is passed along (no second decode)
+        self.job = AnalysisJob(self.current_image_array, self.current_metadata, self)
+        self.job.stage_changed.connect(self.on_analysis_stage)
+        self.job.result_ready.connect(self.on_analysis_result)
+        self.job.failed.connect(self.on_analysis_failed)
+        self.job.finished.connect(self.on_analysis_finished)
+        self.job.start()
 
-        try:
-            # 1. Run Analysis
-            result = self.analyzer.analyze(self.current_image_array)
-            
-            if "error" in result:
-                QMessageBox.warning(self, "Analiz Hatası", result["error"])
-                self.lbl_status.setText(f"Hata: {result['error']}")
-            else:
-                self.display_results(result)
-                
-        except Exception as e:
-             QMessageBox.critical(self, "Hata", f"Analiz sırasında bir hata oluştu:\n{str(e)}")
-             self.lbl_status.setText("Analiz hatası.")
-                
+    def cancel_ai_analysis(self):
+        if self.job is not None:
+            self.job.requestInterruption()
+            self.btn_cancel.setEnabled(False)
+            self.lbl_status.setText("İptal ediliyor...")
+
+    def stop_analysis(self):
+        """
+        Cancels a running analysis (window/dialog closing). Waits at most
+        STOP_WAIT_MS; a job still stuck in the model load is handed to the
+        application so it is not destroyed with the widget while running.
+        """
+        job = self.job
+        if job is None:
+            return
+        job.requestInterruption()
+        if job.wait(STOP_WAIT_MS):
+            return
+        for signal in (job.stage_changed, job.result_ready, job.failed, job.finished):
+            signal.disconnect()
+        self.job = None
+        app = QCoreApplication.instance()
+        job.setParent(app)
+        job.finished.connect(job.deleteLater)
+        app.aboutToQuit.connect(job.wait) # The window is gone by then; nothing freezes
+        self.btn_ai.setEnabled(True)
+        self.btn_cancel.setVisible(False)
+
+    def closeEvent(self, event):
+        self.stop_analysis()
+        super().closeEvent(event)
+
+    def on_analysis_stage(self, stage):
+        if self.job is not None and not self.job.isInterruptionRequested():
+            self.lbl_status.setText(STAGE_LABELS.get(stage, stage))
+
+    def on_analysis_result(self, result):
+        if self.job is not None and self.job.image is not self.current_image_array:
+            return # Another image was opened meanwhile
+
+        if result.get("cancelled"):
+            self.lbl_status.setText("Analiz iptal edildi.")
+        elif "error" in result:
+            QMessageBox.warning(self, "Analiz Hatası", result["error"])
+            self.lbl_status.setText(f"Hata: {result['error']}")
+        else:
+            self.display_results(result)
+
+    def on_analysis_failed(self, message):
+        QMessageBox.critical(self, "Hata", f"Analiz sırasında bir hata oluştu:\n{message}")
+        self.lbl_status.setText("Analiz hatası.")
 
-        finally:
-            self.btn_ai.setEnabled(True)
-            self.setCursor(Qt.CursorShape.ArrowCursor)
+    def on_analysis_finished(self):
+        if self.job is not None:
+            self.job.deleteLater()
+        self.job = None
+        self.btn_ai.setEnabled(True)
+        self.btn_cancel.setVisible(False)
 
     def on_points_updated(self, points):
         if len(points) == 4:
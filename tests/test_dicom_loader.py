@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+import pytest
+
+from src.core.dicom_loader import window_lut, window_to_uint8, jpeg_size
+
+
+def reference_window(pixels, slope, intercept, window=None):
+    """The per-pixel float formula the LUT replaces."""
+    rescaled = pixels.astype(np.float64) * slope + intercept
+    min_val, max_val = window if window is not None else (rescaled.min(), rescaled.max())
+    if max_val == min_val:
+        return np.zeros(pixels.shape, np.uint8)
+    return np.uint8((np.clip(rescaled, min_val, max_val) - min_val) / (max_val - min_val) * 255.0)
+
+
+@pytest.mark.parametrize("dtype", [np.uint16, np.int16, np.uint8])
+@pytest.mark.parametrize("slope, intercept, window", [
+    (1.0, 0.0, None),
+    (1.0, -1024.0, (-160.0, 240.0)), # CT-style rescale with a soft-tissue window
+    (0.5, 10.0, (100.0, 900.5)),
+    (-1.0, 4095.0, None), # Negative slope (inverted MONOCHROME1-like data)
+])
+def test_lut_matches_float_formula(dtype, slope, intercept, window):
+    info = np.iinfo(dtype)
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(info.min, info.max, size=(64, 96), endpoint=True).astype(dtype)
+    pixels.flat[:2] = info.min, info.max # Both ends of the unsigned view
+    expected = reference_window(pixels, slope, intercept, window)
+    assert np.array_equal(window_to_uint8(pixels, slope, intercept, window), expected)
+
+
+def test_lut_covers_every_signed_value():
+    values = np.arange(-32768, 32768, dtype=np.int16)
+    lut = window_lut(np.int16, 1.0, 0.0, -1000.0, 3000.0)
+    assert lut.shape == (65536,)
+    assert np.array_equal(lut[values.view(np.uint16)], reference_window(values, 1.0, 0.0, (-1000.0, 3000.0)))
+
+
+def test_flat_window_is_black():
+    pixels = np.full((4, 4), 700, np.uint16)
+    assert not window_to_uint8(pixels).any()
+    assert not window_to_uint8(pixels.astype(np.float32)).any()
+
+
+@pytest.mark.parametrize("progressive, sof", [(False, b"\xff\xc0"), (True, b"\xff\xc2")])
+def test_jpeg_size(progressive, sof):
+    img = np.random.default_rng(1).integers(0, 256, size=(333, 517), dtype=np.uint8)
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_PROGRESSIVE, int(progressive)])
+    assert ok
+    data = buf.tobytes()
+    assert sof in data
+    assert jpeg_size(data) == (517, 333)
+    assert jpeg_size(memoryview(buf)) == (517, 333)
+
+
+def test_jpeg_size_rejects_other_data():
+    ok, png = cv2.imencode(".png", np.zeros((8, 8), np.uint8))
+    assert jpeg_size(png.tobytes()) is None
+    assert jpeg_size(b"\xff\xd8\xff") is None # Truncated header
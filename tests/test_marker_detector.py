@@ -0,0 +1,104 @@
+from collections import Counter
+
+import cv2
+import numpy as np
+import pytest
+
+from src.core import marker_detector
+from src.core.marker_detector import MarkerDetector, ROI_PAD, VARIANT_ORDER
+
+
+def corner_roi(texts, white=True, scale=3, thickness=6):
+    """Padded corner ROI (as prepare_rois builds it) with texts drawn at (x, y)."""
+    img = np.full((400, 700), 40 if white else 200, np.uint8)
+    for text, org in texts:
+        cv2.putText(img, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, 230 if white else 20, thickness)
+    return cv2.copyMakeBorder(img, ROI_PAD, ROI_PAD, ROI_PAD, ROI_PAD, cv2.BORDER_CONSTANT, value=[0])
+
+
+@pytest.mark.parametrize("white", [True, False], ids=["white", "dark"])
+@pytest.mark.parametrize("scale", [2, 3, 4])
+@pytest.mark.parametrize("letter", ["L", "R"])
+def test_isolated_marker_matches(letter, scale, white):
+    side, score = MarkerDetector.match_glyphs(corner_roi([(letter, (100, 250))], white, scale))
+    assert side == letter
+    assert score >= MarkerDetector.GLYPH_MIN_SCORE
+
+
+@pytest.mark.parametrize("white", [True, False], ids=["white", "dark"])
+@pytest.mark.parametrize("word", ["HOSPITAL", "ALI", "ARDA", "LR"])
+def test_letters_inside_words_are_rejected(word, white):
+    side, _ = MarkerDetector.match_glyphs(corner_roi([(word, (60, 250))], white, scale=2))
+    assert side is None
+
+
+@pytest.mark.parametrize("white", [True, False], ids=["white", "dark"])
+def test_isolated_marker_next_to_a_word(white):
+    # Burned-in text elsewhere in the corner must not hide a standalone marker
+    roi = corner_roi([("ALI", (40, 100)), ("R", (500, 330))], white, scale=2)
+    side, _ = MarkerDetector.match_glyphs(roi)
+    assert side == "R"
+
+
+def test_blank_corner():
+    side, score = MarkerDetector.match_glyphs(corner_roi([]))
+    assert side is None
+    assert score == 0.0
+
+
+class FakeReader:
+    """
+    EasyOCR stand-in: the variant index is stamped into pixel (0, 0) by the
+    patched _build_variant, and the left/right ROI is told apart by brightness.
+    answers maps (roi, variant name) -> text.
+    """
+
+    def __init__(self, answers):
+        self.answers = answers
+
+    def readtext(self, img):
+        roi = "left" if img[40:-40, 40:-40].mean() < 100 else "right"
+        text = self.answers.get((roi, VARIANT_ORDER[int(img[0, 0])]))
+        return [(None, text, 0.9)] if text else []
+
+    def readtext_batched(self, images, batch_size=16):
+        return [self.readtext(img) for img in images]
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    monkeypatch.setattr(MarkerDetector, "variant_hits", Counter())
+    monkeypatch.setattr(MarkerDetector, "tier_hits", Counter())
+    monkeypatch.setattr(MarkerDetector, "_stats_loaded", True)
+    # Hits recorded by the first path must not reorder the sweep of the second
+    monkeypatch.setattr(MarkerDetector, "variant_order", classmethod(lambda cls: list(VARIANT_ORDER)))
+
+    def stamped(name, roi):
+        img = roi.copy()
+        img[0, 0] = VARIANT_ORDER.index(name)
+        return img
+    monkeypatch.setattr(marker_detector, "_build_variant", stamped)
+
+    def install(answers):
+        monkeypatch.setattr(MarkerDetector, "get_reader", classmethod(lambda cls: FakeReader(answers)))
+    return install
+
+
+def two_tone_image():
+    # Dark left, bright right: the two corner ROIs differ; no glyphs, so OCR decides
+    img = np.full((1000, 1200), 30, np.uint8)
+    img[:, 600:] = 220
+    return img
+
+
+@pytest.mark.parametrize("answers, expected", [
+    ({("left", "Upscaled"): "L", ("right", "Original"): "R"}, "L"), # Left ROI outranks an earlier variant
+    ({("right", "Adaptive"): "R", ("right", "Inverted"): "LEFT"}, "L"), # Earliest variant of the right ROI
+    ({("left", "Inverted"): "SAG", ("left", "Fixed180"): "L"}, "R"),
+    ({}, None),
+])
+def test_batched_and_single_image_sweeps_agree(fake_ocr, answers, expected):
+    fake_ocr(answers)
+    image = two_tone_image()
+    assert MarkerDetector.detect_side(image) == expected
+    assert MarkerDetector.detect_sides([image, image]) == [expected, expected]
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+from src.core.batch_item import BatchItem
+from src.core.result_cache import ResultCache
+
+
+@pytest.fixture
+def study(tmp_path):
+    path = tmp_path / "study.jpg"
+    path.write_bytes(b"\xff\xd8 image bytes")
+    return str(path)
+
+
+@pytest.fixture
+def model(tmp_path):
+    path = tmp_path / "model.pth"
+    path.write_bytes(b"weights v1")
+    return str(path)
+
+
+def open_cache(tmp_path, model_path):
+    return ResultCache(str(tmp_path / "results.sqlite3"), model_path)
+
+
+def finished_item(path, confirmed=False):
+    item = BatchItem(path)
+    item.status = "Tamamlandı"
+    item.angle = 162.5
+    item.diagnosis = "Pes Planus"
+    item.lines = [((10, 20), (30.5, 40)), ((10, 20), (50, 20))]
+    item.side = "L"
+    item.ocr_side = "L"
+    item.is_confirmed = confirmed
+    return item
+
+
+def test_hit_restores_the_result(tmp_path, study, model):
+    cache = open_cache(tmp_path, model)
+    cache.put(finished_item(study))
+    cache.close()
+
+    cache = open_cache(tmp_path, model) # Survives a restart
+    item = BatchItem(study)
+    assert cache.apply(item)
+    assert item.status == "Tamamlandı"
+    assert (item.angle, item.diagnosis, item.side, item.ocr_side) == (162.5, "Pes Planus", "L", "L")
+    assert item.lines == [((10, 20), (30.5, 40)), ((10, 20), (50, 20))]
+    assert not item.is_confirmed
+    cache.close()
+
+
+def test_unfinished_items_are_not_stored(tmp_path, study, model):
+    cache = open_cache(tmp_path, model)
+    item = finished_item(study)
+    item.status = "Hata"
+    cache.put(item)
+    assert cache.get(study) is None
+    cache.close()
+
+
+def test_miss_when_mtime_changes(tmp_path, study, model):
+    cache = open_cache(tmp_path, model)
+    cache.put(finished_item(study))
+    st = os.stat(study)
+    os.utime(study, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    item = BatchItem(study)
+    assert not cache.apply(item)
+    assert item.status == "Bekliyor"
+    cache.close()
+
+
+def test_miss_when_the_model_changes(tmp_path, study, model):
+    cache = open_cache(tmp_path, model)
+    cache.put(finished_item(study))
+    cache.close()
+
+    with open(model, "wb") as f:
+        f.write(b"weights v2")
+    cache = open_cache(tmp_path, model)
+    assert not cache.apply(BatchItem(study))
+    cache.close()
+
+
+def test_confirmed_results_survive_a_model_change(tmp_path, study, model):
+    cache = open_cache(tmp_path, model)
+    cache.put(finished_item(study, confirmed=True))
+    cache.close()
+
+    with open(model, "wb") as f:
+        f.write(b"weights v2")
+    cache = open_cache(tmp_path, model)
+    item = BatchItem(study)
+    assert cache.apply(item)
+    assert item.is_confirmed
+    cache.close()
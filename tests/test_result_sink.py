@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from src.core.batch_item import BatchItem
+from src.core.result_sink import JsonlSink, CsvSink, open_sink, read_records, latest_records
+
+
+def finished_item(name, angle=20.0):
+    item = BatchItem(os.path.join("/veri", f"{name}.jpg"))
+    item.status = "Tamamlandı"
+    item.angle = angle
+    item.diagnosis = "Normal"
+    item.lines = [((1, 2), (3, 4)), ((1, 2), (5, 2))]
+    return item
+
+
+@pytest.mark.parametrize("sink_class, ext", [(JsonlSink, ".jsonl"), (CsvSink, ".csv")])
+def test_append_after_truncated_line(tmp_path, sink_class, ext):
+    path = str(tmp_path / f"run{ext}")
+    sink = sink_class(path)
+    sink.write(finished_item("a"))
+    sink.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"path": "/veri/b.jpg", "angle"' if ext == ".jsonl" else "/veri/b.jpg,b.jpg,") # Crash mid-write
+
+    sink = sink_class(path)
+    sink.write(finished_item("c"))
+    sink.close()
+    assert [os.path.basename(r["path"]) for r in read_records(path)] == ["a.jpg", "c.jpg"]
+
+
+def test_items_without_result_are_skipped(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    sink = JsonlSink(path)
+    sink.write(BatchItem("/veri/bekliyor.jpg"))
+    sink.write(finished_item("a", angle=18.5))
+    sink.write(finished_item("a", angle=21.0)) # Correction: last record wins
+    sink.close()
+    records = latest_records(path)
+    assert len(records) == 1
+    assert records[0]["angle"] == 21.0
+    assert records[0]["lines"] == [[[1, 2], [3, 4]], [[1, 2], [5, 2]]]
+
+
+def test_parquet_readable_after_interrupted_run(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "run.parquet")
+    sink = open_sink(path, rows_per_part=4)
+    for i in range(10):
+        sink.write(finished_item(f"s{i}", angle=float(i)))
+    # No close(): the process died here; the 2 buffered records are lost
+    records = list(read_records(path))
+    assert [r["angle"] for r in records] == [float(i) for i in range(8)]
+    assert records[0]["lines"] == [[[1, 2], [3, 4]], [[1, 2], [5, 2]]]
+
+    # A rerun appends new parts after the complete ones
+    sink = open_sink(path, rows_per_part=4)
+    sink.write(finished_item("s8", angle=8.0))
+    sink.close()
+    assert [r["angle"] for r in read_records(path)] == [float(i) for i in range(9)]
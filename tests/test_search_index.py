@@ -0,0 +1,71 @@
+import pytest
+
+from src.core.batch_item import BatchItem
+from src.core.search_index import SearchIndex, fold_text
+
+
+def patient(name, patient_id=""):
+    item = BatchItem(f"/veri/{patient_id or name}.dcm")
+    item.patient_name = name
+    item.patient_id = patient_id
+    return item
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("ŞAHİN", "sahin"),
+    ("EMIR", "emir"),
+    ("Emır", "emir"),
+    ("İğdeÇÖÜ", "igdecou"),
+    ("YILMAZ^AYŞE", "yilmaz ayse"),
+    ("  ÖZ_TÜRK  ", "oz turk"),
+])
+def test_fold_text_turkish(text, expected):
+    assert fold_text(text) == expected
+
+
+def test_dotted_and_dotless_i_match_each_other():
+    index = SearchIndex()
+    index.add([patient("İLKER"), patient("ILGIN"), patient("ılım"), patient("AHMET")])
+    assert index.match("il") == {0, 1, 2}
+    assert index.match("İL") == {0, 1, 2}
+    assert index.match("ıl") == {0, 1, 2}
+
+
+def test_name_and_id_are_searched():
+    index = SearchIndex()
+    index.add([patient("ŞAHİN^ALİ", "12345"), patient("DEMİR^ALİ", "67890")])
+    assert index.match("sahin ali") == {0}
+    assert index.match("678") == {1}
+    assert index.match("ali") == {0, 1}
+
+
+def test_narrowing_only_rescans_previous_matches():
+    index = SearchIndex()
+    index.add([patient("ŞAHİN"), patient("ŞAKİR"), patient("ÖZTÜRK")])
+    assert index.match("ş") == {0, 1}
+    # Rows outside the previous result are not looked at while narrowing
+    index.keys[2] = "sah"
+    assert index.match("şa") == {0, 1}
+    assert index.match("şah") == {0}
+    # A query that does not extend the previous one scans every row again
+    assert index.match("sa") == {0, 1, 2}
+
+
+def test_rows_added_while_filtering_join_the_result():
+    index = SearchIndex()
+    index.add([patient("ÇELİK"), patient("KAYA")])
+    assert index.match("celik") == {0}
+    index.add([patient("ÇELİKER"), patient("ARSLAN")])
+    assert index.accepts(2)
+    assert not index.accepts(3)
+    assert index.match("çeliker") == {2}
+
+
+def test_empty_query_shows_all():
+    index = SearchIndex()
+    index.add([patient("KAYA")])
+    assert index.match("kaya") == {0}
+    assert index.match("  ") is None
+    assert index.accepts(0)
+    index.clear()
+    assert index.keys == [] and index.accepts(5)